@@ -0,0 +1,473 @@
+#
+# 1337ris -- board.py
+# Henry Weiss
+#
+# Represents the playing field. The grid is stored as a list of row objects
+# (bytearrays, one byte per tile), where each tile is a small integer cell
+# code instead of a type char -- see CELL_TYPES below for the mapping. Since
+# whole rows are objects, clearing a line is just a matter of splicing its
+# row out of the list and inserting a fresh, empty one, instead of copying
+# every tile above it down one by one.
+#
+# Alongside the rows, the board also keeps an integer bitmask for every row,
+# where bit x is set if the tile at column x is filled. That way, collision
+# checks and full line checks are just a couple of integer ops per row
+# instead of a comparison per tile. All writes to the grid MUST go through
+# set()/set_code() (or the row helpers), otherwise the masks will fall out
+# of sync.
+#
+# Every write also bumps the board's version number, so anything derived
+# from the board's contents (like where the ghost piece lands) can be cached
+# and only recomputed when the version changes.
+#
+# Finally, the board tracks the surface of every column, so finding how far
+# a piece can drop is just a comparison per column against the piece's bottom
+# profile. The board can be split into regions of rows with their own gravity
+# (see rules.py), which each get their own surfaces: in a region where things
+# fall down, a column's surface is its topmost filled tile, and where things
+# fall up, it's the bottommost one. Compacting lines in one region only has
+# to recalculate that region's surfaces.
+#
+# Tiles that are blowing up get their own cell code, and the board keeps a
+# set of where they all are, so they can be cleared out without searching
+# the whole grid. Which frame of the explosion animation to show is up to
+# whoever draws them, since it only depends on how long the explosion has
+# been going on. Dynamite gets the same treatment, except its locations are
+# kept sorted top to bottom, left to right, so the next one to detonate is
+# always at the front.
+#
+# The board also keeps an index of every filled tile that isn't exploding, so
+# picking one at random doesn't have to search the whole grid. Since clearing
+# lines moves rows around, tiles in the index go by which row they're in (every
+# row gets an id that sticks with it) instead of by y. The index is a list
+# with a dict of where everything is in it, so adding or removing a tile is
+# just swapping it with the last one.
+#
+
+from .headers import *
+
+# Type char for a tile that's in the middle of exploding
+EXPLODING_TILE = 'X'
+
+# Cell codes. Index 0 is always empty, then the normal tile types, then
+# exploding tiles.
+CELL_TYPES = [' '] + TILES + [EXPLODING_TILE]
+CELL_CODES = dict((type, code) for code, type in enumerate(CELL_TYPES))
+
+CELL_EMPTY = CELL_CODES[' ']
+CELL_DYNAMITE = CELL_CODES['D']
+CELL_EXPLOSION = CELL_CODES[EXPLODING_TILE]
+
+# Whether each cell code counts towards filling up a line (empty, dynamite,
+# and exploding tiles don't).
+SOLID_CELLS = bytes([code != CELL_EMPTY and code != CELL_DYNAMITE and code < CELL_EXPLOSION
+                     for code in range(len(CELL_TYPES))])
+
+# Whether each cell code goes in the filled tile index (anything but empty
+# and exploding tiles)
+INDEXED_CELLS = bytes([code != CELL_EMPTY and code != CELL_EXPLOSION for code in range(len(CELL_TYPES))])
+
+# Translation table that makes every filled tile in a row explode in one go
+EXPLODE_CELLS = bytes([code != CELL_EMPTY and CELL_EXPLOSION for code in range(256)])
+
+class Board:
+    # Creates an empty board of the given (width, height), split into the given
+    # regions (by default, one where everything falls down)
+    def __init__(self, size, regions=None):
+        self.width, self.height = size
+        self.full_mask = (1 << self.width) - 1
+        self.regions = regions or [Region(0, self.height)]
+        self.row_regions = []  # Index of the region each row is in
+
+        for i, region in enumerate(self.regions):
+            self.row_regions.extend([i] * (region.end - region.start))
+
+        self.version = 0
+        self.clear()
+
+    # Empties out the whole board
+    def clear(self):
+        self.rows = [bytearray(self.width) for y in range(self.height)]
+        self.occupied = [0] * self.height  # Bit set for every non-empty tile
+        self.solid = [0] * self.height  # Bit set for every tile that counts towards a line
+        self.surfaces = [[self.get_empty_surface(r)] * self.width for r in range(len(self.regions))]  # Per region, per column
+        self.exploding = set()  # (x, y) of every exploding tile
+        self.dynamite = []  # (y, x) of every dynamite tile, sorted
+        self.row_ids = list(range(self.height))  # Id of the row at each y
+        self.row_y = dict((row_id, row_id) for row_id in self.row_ids)  # Row id => y
+        self.next_row_id = self.height
+        self.filled = []  # (row id, x) of every filled, non-exploding tile
+        self.filled_index = {}  # (row id, x) => where it is in filled
+        self.version += 1
+
+    # Returns a copy of this board that can be changed independently. Cheap,
+    # since it's just one small bytearray per row plus the masks.
+    def copy(self):
+        board = Board.__new__(Board)
+        board.width, board.height = self.width, self.height
+        board.full_mask = self.full_mask
+        board.regions = self.regions
+        board.row_regions = self.row_regions
+        board.rows = [bytearray(row) for row in self.rows]
+        board.occupied = self.occupied[:]
+        board.solid = self.solid[:]
+        board.surfaces = [surface[:] for surface in self.surfaces]
+        board.exploding = set(self.exploding)
+        board.dynamite = self.dynamite[:]
+        board.row_ids = self.row_ids[:]
+        board.row_y = self.row_y.copy()
+        board.next_row_id = self.next_row_id
+        board.filled = self.filled[:]
+        board.filled_index = self.filled_index.copy()
+        board.version = self.version
+
+        return board
+
+    # Returns the tile type char at the given location
+    def get(self, x, y):
+        return CELL_TYPES[self.rows[y][x]]
+
+    # Returns the raw cell code at the given location
+    def get_code(self, x, y):
+        return self.rows[y][x]
+
+    # Changes the tile type at the given location
+    def set(self, x, y, type):
+        self.set_code(x, y, CELL_CODES[type])
+
+    # Changes the cell code at the given location, keeping the row masks updated
+    def set_code(self, x, y, code):
+        bit = 1 << x
+
+        old_code = self.rows[y][x]
+
+        if code == CELL_EXPLOSION:
+            self.exploding.add((x, y))
+        elif old_code == CELL_EXPLOSION:
+            self.exploding.discard((x, y))
+
+        if code == CELL_DYNAMITE and old_code != CELL_DYNAMITE:
+            insort(self.dynamite, (y, x))
+        elif old_code == CELL_DYNAMITE and code != CELL_DYNAMITE:
+            self.dynamite.remove((y, x))
+
+        self.rows[y][x] = code
+
+        if INDEXED_CELLS[code] != INDEXED_CELLS[old_code]:
+            if INDEXED_CELLS[code]:
+                self.add_filled(self.row_ids[y], x)
+            else:
+                self.remove_filled(self.row_ids[y], x)
+
+        r = self.row_regions[y]
+        surface = self.surfaces[r]
+
+        if code != CELL_EMPTY:
+            self.occupied[y] |= bit
+
+            if (y - surface[x]) * self.regions[r].gravity < 0:
+                surface[x] = y
+        else:
+            self.occupied[y] &= ~bit
+
+            # Did we just take off the surface of the column?
+            if y == surface[x]:
+                surface[x] = self.find_surface(r, x, y + self.regions[r].gravity)
+
+        if SOLID_CELLS[code]:
+            self.solid[y] |= bit
+        else:
+            self.solid[y] &= ~bit
+
+        self.version += 1
+
+    # Makes the tile at the given location start exploding
+    def explode(self, x, y):
+        self.set_code(x, y, CELL_EXPLOSION)
+
+    # Makes every filled tile in rows start_y through end_y - 1 explode. Returns
+    # how many tiles that was, counted straight from the row masks.
+    def explode_rows(self, start_y, end_y):
+        exploded = 0
+
+        for y in range(max(start_y, 0), min(end_y, self.height)):
+            mask = self.occupied[y]
+
+            if mask:
+                exploded += bin(mask).count('1')
+                self.rows[y] = self.rows[y].translate(EXPLODE_CELLS)
+                self.solid[y] = 0
+
+                for x in range(self.width):
+                    if mask >> x & 1 and (x, y) not in self.exploding:
+                        self.exploding.add((x, y))
+                        self.remove_filled(self.row_ids[y], x)
+
+        # Any dynamite caught in the blast is gone now
+        self.dynamite = [(y, x) for y, x in self.dynamite if not start_y <= y < end_y]
+        self.version += 1
+
+        return exploded
+
+    # Returns the location of the top-left most dynamite tile at or below row
+    # start_y, or None if there isn't one
+    def find_dynamite(self, start_y=0):
+        i = bisect_left(self.dynamite, (start_y, 0))
+
+        if i < len(self.dynamite):
+            y, x = self.dynamite[i]
+            return (x, y)
+
+        return None
+
+    # Checks if the tile at the given location is exploding
+    def is_exploding(self, x, y):
+        return self.rows[y][x] == CELL_EXPLOSION
+
+    # Clears out every exploding tile, since they're done exploding
+    def clear_exploding(self):
+        for x, y in list(self.exploding):
+            self.set_code(x, y, CELL_EMPTY)
+
+    # Splices a row out of the board and inserts an empty one at new_y (the
+    # index is for after the removal). Everything in between shifts over by
+    # one row towards y, which is exactly what a line clear needs.
+    def remove_row(self, y, new_y=0):
+        if new_y <= y:
+            self.remove_rows([y], new_y, y + 1, 1)
+        else:
+            self.remove_rows([y], y, new_y + 1, -1)
+
+    # Splices all the given rows out of rows start through end - 1 at once, and
+    # packs the rest of those rows towards end - 1 (gravity 1) or start (gravity
+    # -1), with empty rows filling in the other end. Rows outside that range stay
+    # put. The surfaces and the exploding and dynamite tiles only get worked out
+    # once, no matter how many rows there are.
+    def remove_rows(self, ys, start, end, gravity=1):
+        removed = set(ys)
+        kept = [y for y in range(start, end) if y not in removed]
+        blanks = [None] * (end - start - len(kept))
+        order = blanks + kept if gravity > 0 else kept + blanks
+
+        # The removed rows' tiles come out of the index
+        for y in removed:
+            for x in range(self.width):
+                if (self.row_ids[y], x) in self.filled_index:
+                    self.remove_filled(self.row_ids[y], x)
+
+            del self.row_y[self.row_ids[y]]
+
+        rows = []
+        occupied = []
+        solid = []
+        row_ids = []
+        new_rows = {}  # Old row => new row, for every row that's kept
+
+        for new_y, y in enumerate(order, start):
+            if y is None:
+                rows.append(bytearray(self.width))
+                occupied.append(0)
+                solid.append(0)
+                row_ids.append(self.next_row_id)
+                self.next_row_id += 1
+            else:
+                rows.append(self.rows[y])
+                occupied.append(self.occupied[y])
+                solid.append(self.solid[y])
+                row_ids.append(self.row_ids[y])
+                new_rows[y] = new_y
+
+            self.row_y[row_ids[-1]] = new_y
+
+        self.rows[start:end] = rows
+        self.occupied[start:end] = occupied
+        self.solid[start:end] = solid
+        self.row_ids[start:end] = row_ids
+        self.update_surfaces(set(self.row_regions[start:end]))
+        self.version += 1
+
+        if self.exploding:
+            self.exploding = set((tile_x, new_rows.get(tile_y, tile_y)) for tile_x, tile_y in self.exploding
+                                 if tile_y not in removed)
+
+        if self.dynamite:
+            self.dynamite = sorted((new_rows.get(tile_y, tile_y), tile_x) for tile_y, tile_x in self.dynamite
+                                   if tile_y not in removed)
+
+    # Adds a tile to the filled tile index
+    def add_filled(self, row_id, x):
+        self.filled_index[(row_id, x)] = len(self.filled)
+        self.filled.append((row_id, x))
+
+    # Takes a tile out of the filled tile index, by moving the last one into its spot
+    def remove_filled(self, row_id, x):
+        i = self.filled_index.pop((row_id, x))
+        last = self.filled.pop()
+
+        if i < len(self.filled):
+            self.filled[i] = last
+            self.filled_index[last] = i
+
+    # Returns the (x, y) of a random filled tile that isn't exploding, or None
+    # if there aren't any
+    def random_filled(self):
+        if not self.filled:
+            return None
+
+        row_id, x = choice(self.filled)
+        return (x, self.row_y[row_id])
+
+    # Returns the rows of a region in order from the edge things fall away from
+    # to the edge they fall towards
+    def get_region_rows(self, r):
+        region = self.regions[r]
+
+        if region.gravity > 0:
+            return range(region.start, region.end)
+        else:
+            return range(region.end - 1, region.start - 1, -1)
+
+    # What a column's surface is in a region where it's empty (just past the
+    # edge things fall towards)
+    def get_empty_surface(self, r):
+        region = self.regions[r]
+        return region.end if region.gravity > 0 else region.start - 1
+
+    # Finds the surface of a column in a region, starting the search at from_y
+    # (by default, the edge things fall away from)
+    def find_surface(self, r, x, from_y=None):
+        bit = 1 << x
+        rows = self.get_region_rows(r)
+
+        if from_y is not None:
+            rows = rows[rows.index(from_y):] if from_y in rows else []
+
+        for y in rows:
+            if self.occupied[y] & bit:
+                return y
+
+        return self.get_empty_surface(r)
+
+    # Recalculates the surface of every column in the given regions (all of them
+    # by default). Only needs to go until every column has been found, which is
+    # usually just a few rows into the stack.
+    def update_surfaces(self, regions=None):
+        if regions is None:
+            regions = range(len(self.regions))
+
+        for r in regions:
+            surface = [self.get_empty_surface(r)] * self.width
+            remaining = self.full_mask
+
+            for y in self.get_region_rows(r):
+                found = self.occupied[y] & remaining
+
+                if found:
+                    remaining &= ~found
+
+                    for x in range(self.width):
+                        if found >> x & 1:
+                            surface[x] = y
+
+                    if not remaining:
+                        break
+
+            self.surfaces[r] = surface
+
+    # Checks if a single tile is out of bounds or already filled
+    def is_blocked(self, x, y):
+        return x < 0 or x >= self.width or y < 0 or y >= self.height or self.occupied[y] >> x & 1
+
+    # Checks if a list of blocks, offset by (dx, dy), would hit the walls, floor,
+    # or anything already on the board. The blocks are folded into one mask per
+    # row, which is then tested against that row's mask in one go.
+    def collides(self, blocks, dx=0, dy=0):
+        masks = {}
+
+        for block in blocks:
+            x = block[0] + dx
+            y = block[1] + dy
+
+            if x < 0 or x >= self.width or y < 0 or y >= self.height:
+                return True
+
+            masks[y] = masks.get(y, 0) | (1 << x)
+
+        for y in masks:
+            if masks[y] & self.occupied[y]:
+                return True
+
+        return False
+
+    # Same as collides(), but for a piece given as precomputed row masks (a list of
+    # (row offset, mask) pairs, see PieceShape) and its bounding box offsets, with
+    # its origin placed at (x, y). Each row is just one shift and one AND.
+    def collides_masks(self, row_masks, bounds, x, y):
+        left, right, top, bottom = bounds
+
+        if x + left < 0 or x + right >= self.width or y + top < 0 or y + bottom >= self.height:
+            return True
+
+        shift = x + left
+
+        for dy, mask in row_masks:
+            if self.occupied[y + dy] & (mask << shift):
+                return True
+
+        return False
+
+    # Returns how many rows a piece with its origin at (x, y) can fall in the
+    # given direction (1 is down, -1 is up) before it lands, straight from the
+    # column surfaces. The piece is given as its profile on the side it's falling
+    # towards (see PieceShape). The surfaces can only tell if the piece is inside
+    # a region with that gravity, and nothing's between it and the surface (i.e.
+    # it didn't slide under an overhang). Otherwise, this returns None and the
+    # caller has to find out the slow way.
+    def landing_distance(self, profile, x, y, gravity=1):
+        first_y = y + profile[0][1]
+
+        if first_y < 0 or first_y >= self.height:
+            return None
+
+        r = self.row_regions[first_y]
+        region = self.regions[r]
+
+        if region.gravity != gravity:
+            return None
+
+        surface = self.surfaces[r]
+        empty = self.get_empty_surface(r)
+        open_edge = empty != self.height and empty != -1  # Can it fall through to another region?
+        distance = self.height
+
+        for dx, dy in profile:
+            block_y = y + dy
+
+            if not region.start <= block_y < region.end:
+                return None
+
+            column = surface[x + dx]
+
+            if (column - block_y) * gravity <= 0 or (column == empty and open_edge):
+                return None
+
+            distance = min(distance, (column - block_y) * gravity - 1)
+
+        return distance
+
+    # Returns the first empty column from the left edge of a row, and the first
+    # one from the right edge (i.e. how far in whatever's stacked up against
+    # either wall reaches). A full row gives (width, -1).
+    def get_edge_columns(self, y):
+        mask = self.occupied[y]
+        empty = ~mask & self.full_mask
+
+        return ((~mask & (mask + 1)).bit_length() - 1, empty.bit_length() - 1)
+
+    # Checks if a row is completely filled with solid tiles
+    def is_full_row(self, y):
+        return self.solid[y] == self.full_mask
+
+    # Checks if a row has nothing in it at all
+    def is_empty_row(self, y):
+        return self.occupied[y] == 0
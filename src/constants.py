@@ -23,11 +23,23 @@ DEFAULT_FONT = 'data/freesansbold.ttf'  # Doesn't copy on Windows when used with
 GRID_SIZE = (10, 22)  # 22 high to allow rotation off-screen at the top
 GRID_WIDTH, GRID_HEIGHT = GRID_SIZE  # Convenience constants
 GRID_Y_OFFSET = 2  # Only 20 rows are visible
+MAX_BOARD_SIZE = (64, 200)  # Biggest board the prefs can ask for (not counting the hidden rows)
+
+# Length of one logic tick, in milliseconds. Game states are always updated in
+# steps of exactly this long (see main.py).
+LOGIC_TICK = 4
+
+# If a frame takes longer than this (ms), the game just falls behind instead of
+# trying to catch up all at once
+MAX_FRAME_TIME = 250
 
 # Tile types (interchangeably referred to as blocks)
 TILES = ['B', 'D', 'I', 'J', 'L', 'O', 'S', 'T', 'Z']
 NORMAL_TILES = TILES[2:]
 
+# For the explosions (the animation frames are '1' through '10')
+EXPLOSION_FRAMES = 10
+
 # Game states
 (
     STATE_LOADING,
@@ -68,6 +80,9 @@ BLANK_ENTRY = (0, 0, 0, "<empty>")
 # Preference file settings
 PREFS_FILE = "data/prefs.cfg"
 
+# Where latency measurements get written to (see latencymonitor.py)
+LATENCY_FILE = "data/latency.txt"
+
 # Preference keys
 MUSIC_VOLUME = "music_volume_float"
 SOUND_VOLUME = "sound_volume_float"
@@ -77,10 +92,21 @@ STREAM_MUSIC = "stream_music_bool"
 DRAW_BG = "draw_backgrounds_bool"
 SHOW_PREVIEW = "show_preview_bool"
 DRAW_GHOST = "draw_ghost_bool"
+PREVIEW_COUNT = "preview_count_int"  # How many upcoming tetrominoes to show (1-6)
+PIECE_SEED = "piece_seed_int"  # Makes the order of tetrominoes repeatable (0 means random)
+BOARD_WIDTH = "board_width_int"  # Board size, in blocks (10x20 up to MAX_BOARD_SIZE)
+BOARD_HEIGHT = "board_height_int"  # Visible rows only; the hidden ones at the top get added on
+MEASURE_LATENCY = "measure_latency_bool"  # See latencymonitor.py
+THREADED_LOGIC = "threaded_logic_bool"  # See logicthread.py
+PIPELINED_PRESENT = "pipelined_present_bool"  # See presenter.py
 
 SETTINGS = [MUSIC_VOLUME, SOUND_VOLUME, DRAW_FRAMERATE, STREAM_MUSIC,
             DRAW_BG, SHOW_PREVIEW, DRAW_GHOST]
 
+# Autoshift, i.e. holding down a movement key (in milliseconds)
+DAS_DELAY = "das_delay_int"  # Before the key starts repeating
+ARR = "arr_int"  # Between repeats (0 moves as far as possible right away)
+
 # Key config
 MOVE_LEFT_KEY = "move_left_keycode_int"
 MOVE_RIGHT_KEY = "move_right_keycode_int"
@@ -98,7 +124,10 @@ CONTROLS = [MOVE_LEFT_KEY, MOVE_RIGHT_KEY, ROTATE_RIGHT_KEY, ROTATE_LEFT_KEY,
 # Default values
 DEFAULTS = {MUSIC_VOLUME: 0.75, SOUND_VOLUME: 0.75, RUN_FULLSCREEN: False, DRAW_FRAMERATE: False, STREAM_MUSIC: True, DRAW_GHOST: True,
             DRAW_BG: True, SHOW_PREVIEW: True, MOVE_LEFT_KEY: K_LEFT, MOVE_RIGHT_KEY: K_RIGHT, ROTATE_RIGHT_KEY: K_UP, ROTATE_LEFT_KEY: K_TAB,
-            SPEEDUP_KEY: K_DOWN, DROP_KEY: K_SPACE, DETONATE_KEY: K_LSHIFT, PAUSE_KEY: K_ESCAPE, QUIT_KEY: K_q}
+            SPEEDUP_KEY: K_DOWN, DROP_KEY: K_SPACE, DETONATE_KEY: K_LSHIFT, PAUSE_KEY: K_ESCAPE, QUIT_KEY: K_q,
+            DAS_DELAY: 150, ARR: 30, MEASURE_LATENCY: False, THREADED_LOGIC: False,
+            PIPELINED_PRESENT: False, PREVIEW_COUNT: 1, PIECE_SEED: 0,
+            BOARD_WIDTH: GRID_WIDTH, BOARD_HEIGHT: GRID_HEIGHT - GRID_Y_OFFSET}
 
 # For screen transitions
 TOTAL_TRANSITIONS = 8
@@ -25,36 +25,58 @@ class ConvergenceMode(TraditionalMode):
             self.merging = False
 
             if types[0] == 'B' or types[0] == 'D':
-                self.current.reset(types[0])
+                self.current.reset(types[0], self.rules.spawn_point, self.rules.rotate_all)
             else:
-                self.current.reset(types[1])
+                self.current.reset(types[1], self.rules.spawn_point, self.rules.rotate_all)
 
             return
 
         self.merging = True
 
-        # Generate new types
-        self.left.reset(types[0], (-1, 3))
-        self.right.reset(types[1], (GRID_WIDTH, 3))
-
-        # Put them on the left/right-most part of the screen
-        can_move = False
+        # Generate new types, and put them on the left/right-most part of the screen
+        self.left.reset(types[0], (-1, SPAWN_ROW))
+        self.right.reset(types[1], (self.width, SPAWN_ROW))
+        self.move_to_edge(self.left, 1)
+        self.move_to_edge(self.right, -1)
+
+    # Moves a tetromino as far over to one side of the screen as it'll go (the
+    # left side if dx is 1, the right if -1), right up against the wall or
+    # whatever's stacked up next to it. The board's edges say how far in it has
+    # to go at the very least; from there, it only has to slide over one column
+    # at a time if a row has gaps its other blocks would run into.
+    def move_to_edge(self, tetromino, dx):
+        row_masks, bounds = tetromino.get_row_masks(), tetromino.get_bounds()
+        left, right = bounds[0], bounds[1]
+        x = None
+
+        for dy, mask in row_masks:
+            y = tetromino.y + dy
+
+            if 0 <= y < self.height:
+                first_empty, last_empty = self.board.get_edge_columns(y)
+            else:
+                first_empty, last_empty = 0, self.width - 1
 
-        while not can_move:
-            for block in self.left.get_blocks():
-                if not self.block_will_collide(block):
-                    can_move = True
-                else:
-                    self.left.center_x += 1
+            if dx > 0:
+                row_x = first_empty - (left + (mask & -mask).bit_length() - 1)  # Leftmost block up against it
+                x = row_x if x is None else max(x, row_x)
+            else:
+                row_x = last_empty - (left + mask.bit_length() - 1)  # Rightmost block up against it
+                x = row_x if x is None else min(x, row_x)
+
+        # Slide in the rest of the way until it fits (or hits the other wall, in
+        # which case there's no room and it's game over)
+        if dx > 0:
+            limit = self.width - 1 - right
+            x = min(x, limit)
+        else:
+            limit = -left
+            x = max(x, limit)
 
-        can_move = False
+        while x != limit and self.board.collides_masks(row_masks, bounds, x, tetromino.y):
+            x += dx
 
-        while not can_move:
-            for block in self.right.get_blocks():
-                if not self.block_will_collide(block):
-                    can_move = True
-                else:
-                    self.right.center_x -= 1
+        tetromino.x = x
 
     # If we're merging, rotate both the left and right pieces
     def rotate(self, angle):
@@ -77,16 +99,20 @@ class ConvergenceMode(TraditionalMode):
         if not self.merging:
             return TraditionalMode.move_left(self)
 
+        return False
+
     # Can't move right until we've merged the pieces
     def move_right(self):
         if not self.merging:
             return TraditionalMode.move_right(self)
 
+        return False
+
     # If we're merging, this moves the two pieces towards each other.
     def move_down(self):
         if self.merging:
             # Should we merge?
-            if self.left_right_collision(True):
+            if self.left_right_collision():
                 # Determine the new type
                 if self.got_left_type:
                     new_type = self.left.type
@@ -105,47 +131,42 @@ class ConvergenceMode(TraditionalMode):
                 self.lock_snd.play()
 
                 # And delay a bit
-                self.drop_delay = DROP_DELAY
+                self.timers.schedule(DROP_TIMER, DROP_DELAY)
 
             else:
-                self.right.center_x -= 1
-                self.left.center_x += 1
+                self.right.x -= 1
+                self.left.x += 1
 
             return self.merging
 
         else:
             return TraditionalMode.move_down(self)
 
+    # While merging, "falling" moves the pieces towards each other instead
+    def fall(self, cells):
+        if self.merging:
+            return self.fall_by_steps(cells)
+        else:
+            return TraditionalMode.fall(self, cells)
+
+    def hard_drop(self):
+        if self.merging:
+            self.hard_drop_by_steps()
+        else:
+            TraditionalMode.hard_drop(self)
+
     # Game over works a little differently in Convergence
     def check_game_over(self):
         if self.merging:
-            for block in self.left.get_blocks():
-                if self.block_will_collide(block):
-                    self.game_over = True  # :(
-                    self.main.fadeout_sound()
-                    return
-
-            for block in self.right.get_blocks():
-                if self.block_will_collide(block):
-                    self.game_over = True  # :(
-                    self.main.fadeout_sound()
-                    return
+            if self.piece_will_collide(self.left) or self.piece_will_collide(self.right):
+                self.game_over = True  # :(
+                self.main.fadeout_sound()
         else:
             TraditionalMode.check_game_over(self)
 
-    # Checks if the left/right pieces collided
-    def left_right_collision(self, test_potential_collision=False):
-        # First check if the center_x's are past each other
-        if self.left.center_x >= self.right.center_x:
-            return True
-
-        # Check if any of the blocks are colliding
-        for left_block in self.left.get_blocks():
-            for right_block in self.right.get_blocks():
-                if Rect(left_block, (1, 1)).colliderect(Rect(right_block, (1, 1))):
-                    return True
-
-        return False
+    # Checks if the left/right pieces collided (or passed each other)
+    def left_right_collision(self):
+        return self.left.center_x >= self.right.center_x or self.left.overlaps(self.right)
 
     # Clearing lines via dynamite/bombs should be easier, since
     # this mode is rather harsh.
@@ -153,6 +174,24 @@ class ConvergenceMode(TraditionalMode):
         blocks_per_line /= 2
         TraditionalMode.clear_blocks(self, y_offset, score_per_block, blocks_per_line)
 
+    # The left/right pieces get moved around too
+    def take_snapshot(self):
+        snapshot = TraditionalMode.take_snapshot(self)
+        snapshot.left = copy(self.left)
+        snapshot.right = copy(self.right)
+
+        return snapshot
+
+    # While merging, the view follows the left/right pieces instead (well, the
+    # middle of them, if they're too far apart to both fit)
+    def update_viewport(self):
+        if self.merging:
+            left, right, top, bottom = self.left.get_extremities()
+            right_left, right_right, right_top, right_bottom = self.right.get_extremities()
+            self.scroll_to(left, right_right, min(top, right_top), max(bottom, right_bottom))
+        else:
+            TraditionalMode.update_viewport(self)
+
     # Draws the left/right pieces if merging
     def draw_current_tetromino(self, surface):
         if self.merging:
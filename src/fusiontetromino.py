@@ -4,48 +4,67 @@
 #
 # Subclass of a normal tetromino that allows it to fuse with another tetromino.
 #
+# There are only so many ways two tetrominoes can end up fused (two shapes, two
+# orientations, and wherever one ended up next to the other), so each fused
+# shape only gets worked out the first time it comes up. After that, fusing
+# is just a lookup, and since it's a PieceShape, all four of its orientations
+# are already precomputed too.
+#
 
 from .headers import *
 
-class FusionTetromino(Tetromino):
-    # Adds the blocks of another tetromino to this tetromino. Since
-    # there are two tetrominoes, you'll need to specify the new type.
-    def __init__(self, new_type, left, right):
-        self.type = new_type
+# Fused shapes worked out so far. Keyed by both pieces' shapes and orientations,
+# plus where the right piece is compared to the left one; each entry is the
+# fused shape and where its center block is compared to the left piece.
+FUSION_SHAPES = {}
 
-        # Gather all the blocks together first
-        blocks = left.get_blocks() + right.get_blocks()
+# Works out the shape that the left and right pieces fuse into, as above
+def fuse_shapes(left, right):
+    dx, dy = right.x - left.x, right.y - left.y
 
-        # Determine the centermost block and use that
-        # for rotation.
-        left_x, right_x, up_y, down_y = self.get_extremities()
+    # Gather all the blocks together first (relative to the left piece, and
+    # without any duplicates where they overlap)
+    blocks = list(dict.fromkeys(left.get_offsets() + tuple((x + dx, y + dy) for x, y in right.get_offsets())))
 
-        avg_x = (left_x + right_x) / 2
-        avg_y = (up_y + down_y) / 2
+    # Determine the centermost block and use that
+    # for rotation.
+    left_x = min([block[0] for block in blocks])
+    right_x = max([block[0] for block in blocks])
+    up_y = min([block[1] for block in blocks])
+    down_y = max([block[1] for block in blocks])
 
-        # Now find the block nearest to the average
-        dists = []
+    avg_x = (left_x + right_x) / 2
+    avg_y = (up_y + down_y) / 2
 
-        for block in blocks:
-            dists.append((abs(avg_x - block[0]), abs(avg_y - block[1]), block))
+    # Now find the block nearest to the average
+    center = min(blocks, key=lambda block: (abs(avg_x - block[0]), abs(avg_y - block[1]), block))
+    blocks.remove(center)
 
-        dists.sort()
+    # Make that the center block, and store the rest relative to it
+    center_x, center_y = center
+    shape = PieceShape([(0, 0)] + [(x - center_x, y - center_y) for x, y in blocks])
 
-        # Make that the center block
-        self.center_x = dists[0][2][0]
-        self.center_y = dists[0][2][1]
+    return (shape, center)
 
-        # And append the rest of the blocks
-        self.blocks = []
+class FusionTetromino(Tetromino):
+    __slots__ = ()
 
-        for block in blocks:
-            if block not in self.blocks and not (block[0] == self.center_x and block[1] == self.center_y):
-                self.blocks.append(block)
+    # Adds the blocks of another tetromino to this tetromino. Since
+    # there are two tetrominoes, you'll need to specify the new type.
+    def __init__(self, new_type, left, right):
+        Tetromino.__init__(self)
+        self.type = new_type
+        self.rotate_all = True
+
+        key = (left.shape, left.rot, right.shape, right.rot, right.x - left.x, right.y - left.y)
+
+        if key not in FUSION_SHAPES:
+            FUSION_SHAPES[key] = fuse_shapes(left, right)
+
+        self.shape, (center_x, center_y) = FUSION_SHAPES[key]
+        self.x = left.x + center_x
+        self.y = left.y + center_y
 
     # Since we have no idea what this piece will be, we'll let anything rotate
     def can_rotate(self, type):
         return True
-
-    # See above
-    def correct_for_i_tile(self):
-        pass
@@ -30,10 +30,18 @@ class GameState:
     # Used by subclasses to detect when the game state is paused (e.g. window/app inactive, or other similar things)
     paused = False
 
+    # Set by subclasses that can have their logic run on its own thread (see logicthread.py).
+    # They have to implement take_snapshot() too.
+    supports_logic_thread = False
+
     # Constructor. Used to notify game states of the main object for
-    # communication with the controllers and such.
+    # communication with the controllers and such. Also gives each game state
+    # its own timer scheduler (see scheduler.py) for any delays it needs.
+    # Game states are in charge of advancing it in update(), since they know
+    # best when their timers should stop (like when the game is paused).
     def __init__(self, main):
         self.main = main
+        self.timers = Scheduler()
 
     #
     # Methods to be overrided by subclasses
@@ -65,6 +73,8 @@ class GameState:
 
     # The updating method, called during every iteration of the game loop. Use the elapsed_time
     # parameter to make calculations as to how much the state has changed in between frames.
+    # (The main loop always updates in fixed ticks, so it's really always LOGIC_TICK, and this
+    # might get called several times per frame or not at all. See main.py.)
     # Aside from key_down(), none of the methods mentioned here besides this one should directly
     # update the game state while the state is running, as that is this method's purpose.
     def update(self, elapsed_time): pass
@@ -76,6 +86,14 @@ class GameState:
     # whenever text entry is needed.
     def key_down(self, keycode, unicode): pass
 
+    # Called whenever a key is released. Only needed by states that care how long keys are held
+    # down for (like for autoshifting in the game modes).
+    def key_up(self, keycode): pass
+
+    # Returns a copy of this game state that can be drawn while the original keeps updating on
+    # another thread. Only needed by states that set supports_logic_thread.
+    def take_snapshot(self): pass
+
     # Helper method for draw(). While this is the method that subclasses must do their drawing in,
     # there is very little reason to call this method on its own. The separation of this from the
     # draw() method, as explained below, is for the purpose of screen transitions, and any type of
@@ -93,13 +111,13 @@ class GameState:
     # and have that returned, instead of drawing directly to the screen. Otherwise, the default
     # behavior is to just draw to the screen.
     def draw(self, mode=None, draw_to_screen=True):
-        surface = display.get_surface()
+        surface = self.main.get_screen()
 
         if mode == None:
             mode = self.mode  # Use the current mode by default
 
         if not draw_to_screen:
-            surface = display.get_surface().copy()  # Use a new surface
+            surface = surface.copy()  # Use a new surface
 
         # Call the actual drawing function
         self.draw_scene(mode, surface)
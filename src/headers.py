@@ -10,6 +10,14 @@
 import sys, os, math
 from random import *
 from math import sin, pi, ceil
+from bisect import bisect_left, insort
+from heapq import heappush, heappop
+from collections import deque
+from array import array
+from time import perf_counter, sleep
+from copy import copy
+from queue import Queue, Empty
+from threading import Thread, RLock, Condition, current_thread, main_thread
 
 # pygame includes
 import pygame
@@ -25,8 +33,15 @@ from pygame.font import *
 from .constants import *
 from .prefscontroller import *
 from .soundcontroller import *
+from .scheduler import *
+from .piecegenerator import *
+from .latencymonitor import *
+from .presenter import *
+from .particles import *
 from .tetromino import *
 from .fusiontetromino import *
+from .rules import *
+from .board import *
 
 from .gamestate import *
 from .mainmenu import *
@@ -35,4 +50,5 @@ from .traditionalmode import *
 from .crosscutmode import *
 from .convergencemode import *
 from .psychedelicmode import *
+from .logicthread import *
 from .main import *
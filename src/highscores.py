@@ -27,8 +27,9 @@ class HighScores(MainMenu):
         self.file = HIGH_SCORE_FILES[userdata[USERDATA_MODE] - STATE_TRADITIONAL]
         self.name = ''
         self.cursor = CURSOR  # Blinks
-        self.cursor_delay = CURSOR_BLINK_DELAY
         self.userdata = userdata
+        self.timers.clear()
+        self.timers.schedule('cursor', CURSOR_BLINK_DELAY, self.blink_cursor)
 
         # Check if this is a high score
         if userdata is None or not self.is_new_high_score(userdata):
@@ -56,17 +57,16 @@ class HighScores(MainMenu):
 
     # Updates the cursor
     def update(self, elapsed_time):
-        self.cursor_delay -= elapsed_time
+        self.timers.advance(elapsed_time)
 
-        if self.cursor_delay <= 0:
-            # Blink
-            if self.cursor == '':
-                self.cursor = CURSOR
-            else:
-                self.cursor = ''
+    # Blinks the cursor, and waits to blink it again
+    def blink_cursor(self):
+        if self.cursor == '':
+            self.cursor = CURSOR
+        else:
+            self.cursor = ''
 
-            # Reset delay
-            self.cursor_delay = CURSOR_BLINK_DELAY
+        self.timers.schedule('cursor', CURSOR_BLINK_DELAY, self.blink_cursor)
 
     # Takes user input until they press Return
     def key_down(self, keycode, unicode):
@@ -0,0 +1,153 @@
+#
+# 1337ris -- latencymonitor.py
+# Henry Weiss
+#
+# Measures input-to-display latency, i.e. how long it takes from a key press
+# coming off the event queue to the frame that shows its result actually
+# making it to the screen. Every key press gets a timestamp when it's taken
+# off the queue, which then gets followed through the rest of the frame:
+# handing it to the game state (key_down), updating, drawing, and swapping
+# the buffers. Latencies are kept separately for each game state, and can be
+# summed up as percentiles (p50/p95/p99) either on screen or in a file.
+#
+# Note that SDL doesn't tell us when a key was actually pressed, just when we
+# got around to taking it off the queue, so any time spent sitting in the
+# queue before that isn't counted.
+#
+# When a game state runs on the logic thread, a key press isn't handled until
+# that thread gets to it, and doesn't show up until the first snapshot after
+# that. The logic thread times those two stages itself, and the key press
+# joins whichever frame draws that snapshot (see logicthread.py).
+#
+
+from .headers import *
+
+# Stages every key press goes through, in order (each sample keeps how long
+# each one took, plus the total)
+LATENCY_STAGES = ['key_down', 'update', 'draw', 'present']
+
+# Percentiles to report
+LATENCY_PERCENTILES = [50, 95, 99]
+
+# Returns the pth percentile of a sorted list (nearest rank)
+def percentile(values, p):
+    return values[min(len(values) - 1, max(int(ceil(p / 100.0 * len(values))) - 1, 0))]
+
+class LatencyMonitor:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.clear()
+
+    # Throws out every measurement so far
+    def clear(self):
+        self.samples = {}  # State name => list of (total, key_down, update, draw, present) latencies, in ms
+        self.summaries = {}  # State name => cached summarize() result, until more samples come in
+        self.clear_frame()
+
+    # Gets ready to follow the key presses of a new frame
+    def clear_frame(self):
+        self.received = 0  # When this frame's events came off the queue
+        self.pending = []  # (state name, received, handled, updated or None) for every key press this frame
+        self.updated = None  # When the game state finished updating this frame
+        self.drawn = None  # When the game state finished drawing this frame
+
+    # Called right after the events are taken off the queue
+    def events_received(self):
+        self.received = perf_counter()
+
+    # Called after a key press has been handed off to the given game state (it
+    # gets updated along with the rest of the frame, see mark_updated())
+    def key_handled(self, state_name):
+        self.pending.append((state_name, self.received, perf_counter(), None))
+
+    # Adds key presses that the logic thread already handled and updated (as
+    # (state name, received, handled, updated)) to this frame, since this is
+    # the frame that draws them
+    def keys_updated(self, keys):
+        self.pending.extend(keys)
+
+    # Called after the game state has updated
+    def mark_updated(self):
+        if self.pending:
+            self.updated = perf_counter()
+
+    # Called after the game state has drawn itself
+    def mark_drawn(self):
+        if self.pending:
+            self.drawn = perf_counter()
+
+    # Called after the buffers are swapped, which is when every key press this
+    # frame finally shows up on screen
+    def frame_presented(self):
+        self.record_frame(self.take_frame(), perf_counter())
+
+    # Hands over everything measured this frame (or None if there were no key
+    # presses), and gets ready for the next one. For when the buffers get
+    # swapped somewhere else later on (see presenter.py).
+    def take_frame(self):
+        frame = None
+
+        if self.pending:
+            frame = (self.pending, self.updated, self.drawn)
+
+        self.clear_frame()
+        return frame
+
+    # Records the latencies of a frame from take_frame(), which made it to the
+    # screen at the given time. If the update or draw got skipped (say, during
+    # a screen transition), those stages just take no time.
+    def record_frame(self, frame, presented):
+        if frame is None:
+            return
+
+        pending, updated, drawn = frame
+
+        for state_name, received, handled, key_updated in pending:
+            state_updated = key_updated or updated or handled
+            state_drawn = drawn or state_updated
+
+            sample = ((presented - received) * 1000, (handled - received) * 1000,
+                      (state_updated - handled) * 1000, (state_drawn - state_updated) * 1000, (presented - state_drawn) * 1000)
+            self.samples.setdefault(state_name, []).append(sample)
+            self.summaries.pop(state_name, None)
+
+    # Returns the percentiles of the total latency for a game state, plus the
+    # same for each stage, as a list of (name, [p50, p95, p99]) with the total
+    # first. Returns None if nothing has been measured for that state yet.
+    def summarize(self, state_name):
+        if state_name not in self.samples:
+            return None
+
+        if state_name not in self.summaries:
+            summary = []
+
+            for i, name in enumerate(['total'] + LATENCY_STAGES):
+                values = sorted([sample[i] for sample in self.samples[state_name]])
+                summary.append((name, [percentile(values, p) for p in LATENCY_PERCENTILES]))
+
+            self.summaries[state_name] = summary
+
+        return self.summaries[state_name]
+
+    # Returns a one-line summary of the total latency for a game state, for the overlay
+    def get_overlay_text(self, state_name):
+        summary = self.summarize(state_name)
+
+        if summary is None:
+            return "Latency: press a key to measure"
+
+        return "Latency: " + "  ".join(["p%d %.1f" % (p, value) for p, value in zip(LATENCY_PERCENTILES, summary[0][1])]) + \
+               " ms (%d keys)" % len(self.samples[state_name])
+
+    # Writes a report of every game state's latencies to a file
+    def dump(self, filename):
+        output = open(filename, 'w')
+        output.write("# 1337ris input-to-display latency, in ms (" + "/".join(["p%d" % p for p in LATENCY_PERCENTILES]) + ")\n")
+
+        for state_name in sorted(self.samples):
+            output.write("\n%s (%d keys)\n" % (state_name, len(self.samples[state_name])))
+
+            for name, values in self.summarize(state_name):
+                output.write("  %-10s" % name + "".join(["%10.2f" % value for value in values]) + "\n")
+
+        output.close()
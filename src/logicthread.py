@@ -0,0 +1,187 @@
+#
+# 1337ris -- logicthread.py
+# Henry Weiss
+#
+# Optionally runs a game mode's logic on its own thread, so that updating
+# and drawing don't have to wait for each other. pygame lets go of the GIL
+# while it's blitting, so a frame full of blits (psychedelic mode, screen
+# transitions) can overlap with the game logic instead of holding it up,
+# and vice versa.
+#
+# The logic thread updates the game state in fixed ticks, just like the main
+# loop does otherwise (see main.py). Key events don't go to the state directly;
+# the main loop puts them on a queue, and the logic thread hands them off
+# before its next tick. After every batch of ticks, it publishes a snapshot
+# of the game (see GameState.take_snapshot()), which is what the main loop
+# draws. A published snapshot is never changed again, so the main loop can
+# draw it without locking anything.
+#
+# Some things can only be done from the main thread, like switching game
+# states and starting screen transitions. If the game state asks for one of
+# those, Main passes it back here with call_on_main_thread(), and the main
+# loop runs it at the start of the next frame.
+#
+# Whenever the main thread needs to touch the game state itself, it has to
+# hold the lock, which the logic thread holds while it's running.
+#
+# For the latency monitor, a key press only counts as handled once this
+# thread has actually passed it to the game state, and as updated once the
+# first snapshot after that gets published. Those times go along with the
+# snapshot, so the main loop knows which frame really shows each key press.
+#
+
+from .headers import *
+
+class LogicThread(Thread):
+    def __init__(self, main):
+        Thread.__init__(self)
+        self.daemon = True  # Don't keep the game running after the main thread's done
+
+        self.main = main
+        self.lock = RLock()
+        self.input = Queue()  # (game state, method name, args, when it was received) for every key event
+        self.main_calls = Queue()  # (function, args) to call from the main thread
+        self.current_state = None
+        self.tick_time = 0
+        self.snapshot = None  # (snapshot, leftover tick time, when it was published)
+
+        # Key presses being timed by the latency monitor, as (state name, when it
+        # was received, when it was handled), until the next snapshot goes out.
+        # Then they get the publish time tacked on and wait for the main loop to
+        # take them along with that snapshot (see get_snapshot()).
+        self.handled_keys = []
+        self.published_keys = []
+        self.keys_lock = RLock()  # For the snapshot and published keys, which the main loop takes together
+
+    # The game state that's being run on this thread (None if it's just idling).
+    # Changing it starts the new state off fresh.
+    @property
+    def state(self):
+        return self.current_state
+
+    @state.setter
+    def state(self, value):
+        with self.lock:
+            self.current_state = value
+            self.tick_time = 0
+            self.snapshot = None
+            self.handled_keys = []
+            self.published_keys = []
+
+    # Keeps updating the game state until the game quits
+    def run(self):
+        last_time = perf_counter()
+
+        while True:
+            now = perf_counter()
+            elapsed_time = (now - last_time) * 1000
+            last_time = now
+
+            with self.lock:
+                if self.state is not None:
+                    self.step(elapsed_time)
+
+            # Wait until the next tick is due
+            sleep(max(LOGIC_TICK - self.tick_time, 1) / 1000.0)
+
+    # Hands off any waiting key events, then updates the state for every whole
+    # tick that's gone by. Publishes a new snapshot if anything happened.
+    def step(self, elapsed_time):
+        changed = self.process_input()
+
+        # The game stands still during screen transitions, just like it does in
+        # the main loop (and doesn't try to catch up afterwards). That includes
+        # ones the state asked for that the main loop hasn't started yet.
+        if self.main.in_transition or not self.main_calls.empty():
+            self.tick_time = 0
+        else:
+            self.tick_time = min(self.tick_time + elapsed_time, MAX_FRAME_TIME)
+
+        while self.tick_time >= LOGIC_TICK:
+            self.state.update(LOGIC_TICK)
+            self.tick_time -= LOGIC_TICK
+            changed = True
+
+        if changed or self.snapshot is None:
+            self.publish()
+
+    # Passes the waiting key events to the game state they were meant for (any
+    # for a state that's no longer running get thrown out). Returns whether
+    # there were any. Events that came with a received time are being timed.
+    def process_input(self):
+        processed = False
+
+        while True:
+            try:
+                state, method, args, received = self.input.get_nowait()
+            except Empty:
+                return processed
+
+            if state is self.state:
+                getattr(state, method)(*args)
+                processed = True
+
+                if received is not None:
+                    self.handled_keys.append((state.__class__.__name__, received, perf_counter()))
+
+    # Throws out any waiting key events
+    def clear_input(self):
+        while True:
+            try:
+                self.input.get_nowait()
+            except Empty:
+                return
+
+    # Takes a new snapshot of the game state for the main loop to draw. Any key
+    # presses handled since the last one show up for the first time in this one.
+    def publish(self):
+        snapshot = self.state.take_snapshot()
+        published = perf_counter()
+
+        with self.keys_lock:
+            self.snapshot = (snapshot, self.tick_time, published)
+            self.published_keys.extend([key + (published,) for key in self.handled_keys])
+            self.handled_keys = []
+
+    # Returns the latest snapshot, plus how far into the next tick it is by now
+    # (see Main.interpolation), and the timed key presses that have shown up in
+    # it or an earlier one since the last call, as (state name, received,
+    # handled, updated). Takes a snapshot right away if there isn't one yet.
+    def get_snapshot(self):
+        if self.snapshot is None:
+            with self.lock:
+                if self.snapshot is None:
+                    self.publish()
+
+        with self.keys_lock:
+            snapshot, tick_time, published = self.snapshot
+            keys = self.take_published_keys()
+
+        interpolation = (tick_time + (perf_counter() - published) * 1000) / LOGIC_TICK
+
+        return (snapshot, min(interpolation, 1.0), keys)
+
+    # Hands over the timed key presses that have been published since the last
+    # call, as (state name, received, handled, updated). During screen transitions,
+    # the main loop takes them without a snapshot.
+    def take_published_keys(self):
+        with self.keys_lock:
+            keys = self.published_keys
+            self.published_keys = []
+
+        return keys
+
+    # Queues up a function for the main thread to call
+    def call_on_main_thread(self, function, *args):
+        self.main_calls.put((function, args))
+
+    # Called by the main loop to run everything that was queued up for it
+    def run_main_calls(self):
+        while True:
+            try:
+                function, args = self.main_calls.get_nowait()
+            except Empty:
+                return
+
+            with self.lock:
+                function(*args)
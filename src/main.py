@@ -24,6 +24,15 @@
 # it was due to pygame overhead? Or maybe SDL's timer just sucks. I'm
 # guessing it's pygame overhead, but I don't really know.)
 #
+# That said, the game states themselves are now updated in fixed-length
+# ticks: however much time the frame took is added to an accumulator, and
+# the state is updated once for every whole tick in there. That way the game
+# plays exactly the same no matter how fast or slow the frames are (no
+# skipping past a lock because one frame took forever, for instance). The
+# leftover part of a tick is kept in interpolation, so the drawing code can
+# show things partway to where they're going instead of jumping along with
+# the ticks.
+#
 
 from .headers import *
 
@@ -66,9 +75,22 @@ class Main:
         self.image_pool = {}
 
         # Initialize the display
+        self.presenter = None  # See below
         display.set_caption("1337ris")
         self.fullscreen = self.prefs_controller.get(RUN_FULLSCREEN)
 
+        # Only let in the kinds of events we actually handle, so the event queue
+        # isn't full of mouse movements and such that we'd just throw away
+        event.set_blocked(None)
+        event.set_allowed([QUIT, ACTIVEEVENT, KEYDOWN, KEYUP])
+
+        # Run the game modes' logic on its own thread, if we're supposed to (see logicthread.py)
+        self.logic_thread = None
+
+        if self.prefs_controller.get(THREADED_LOGIC):
+            self.logic_thread = LogicThread(self)
+            self.logic_thread.start()
+
         # Initialize and load the game states
         self.states = [MainMenu(self), HighScores(self), TraditionalMode(self), CrossCutMode(self), ConvergenceMode(self), PsychedelicMode(self)]
         self.state = STATE_LOADING
@@ -77,9 +99,21 @@ class Main:
         self.clock = Clock()
         self.fps_font = Font(DEFAULT_FONT, 12)
 
+        # For measuring input latency (Cmd/Ctrl-L toggles it)
+        self.latency_monitor = LatencyMonitor(self.prefs_controller.get(MEASURE_LATENCY))
+
+        # Put frames on the screen from another thread, if we're supposed to (see presenter.py)
+        if self.prefs_controller.get(PIPELINED_PRESENT):
+            self.presenter = Presenter()
+            self.presenter.start()
+
         # For pausing if app is deactivated and such
         self.active = True
 
+        # Fixed-length updates
+        self.tick_time = 0  # Time that hasn't been used up by a tick yet
+        self.interpolation = 0.0  # How far into the next tick the current frame is (0-1)
+
         # Transitions
         self.in_transition = False
         self.current_transition = 0
@@ -91,10 +125,32 @@ class Main:
         for state in self.states:
             self.total_resources += state.total_resources
 
-    # Intercepts attribute changes
-    def __setattr__(self, attr, value):
-        # State changer. Notifies the old and new states of the transition.
-        if attr == "state" and attr in self.__dict__:
+    # The current game state. Changing it notifies the old and new states of the transition.
+    @property
+    def state(self):
+        return self.current_state
+
+    @state.setter
+    def state(self, value):
+        if self.logic_thread is None:
+            self.switch_state(value)
+        elif self.on_main_thread():
+            with self.logic_thread.lock:
+                self.switch_state(value)
+        else:
+            # Only the main thread can do transitions, so let it take care of it
+            self.logic_thread.call_on_main_thread(self.switch_state_from, self.current_state, value)
+
+    # Switches states on behalf of the state that asked to from the logic thread,
+    # unless it's already been switched away from in the meantime (say, two keys
+    # pressed on the game over screen in the same tick)
+    def switch_state_from(self, old_value, value):
+        if self.current_state == old_value:
+            self.switch_state(value)
+
+    # Does the actual work of changing the state (see above)
+    def switch_state(self, value):
+        if hasattr(self, 'current_state'):
             if self.state != STATE_LOADING:
                 # Just choose a random transition
                 transition = TRANSITION_RANDOM
@@ -121,27 +177,49 @@ class Main:
                 # Do transition with the new screen
                 self.transition_screen(transition, self.states[value].draw(None, False))
 
-        # Pauses sounds upon activation/deactivation events
-        elif attr == "active":
-            if not value and self.state >= STATE_TRADITIONAL:
-                self.states[self.state].paused = True
-                self.sound_controller.paused = True
-            elif self.state < STATE_TRADITIONAL or not self.states[self.state].paused:
-                self.sound_controller.paused = not value
-
-        # Switches display modes
-        elif attr == "fullscreen":
-            # Hide the cursor in fullscreen
-            mouse.set_visible(not value)
-
-            # Finally switch the mode
-            if value:
-                display.set_mode(DIMENSIONS, FULLSCREEN)
+        self.current_state = value
+
+        # Hand the new state over to the logic thread if it can run there
+        if self.logic_thread:
+            if value != STATE_LOADING and self.states[value].supports_logic_thread:
+                self.logic_thread.state = self.states[value]
             else:
-                display.set_mode(DIMENSIONS)
+                self.logic_thread.state = None
+
+    # Whether the app is active. Pauses sounds upon activation/deactivation events.
+    @property
+    def active(self):
+        return self.is_active
+
+    @active.setter
+    def active(self, value):
+        if not value and self.state >= STATE_TRADITIONAL:
+            self.states[self.state].paused = True
+            self.sound_controller.paused = True
+        elif self.state < STATE_TRADITIONAL or not self.states[self.state].paused:
+            self.sound_controller.paused = not value
+
+        self.is_active = value
+
+    # Whether we're running fullscreen. Switches display modes.
+    @property
+    def fullscreen(self):
+        return self.is_fullscreen
+
+    @fullscreen.setter
+    def fullscreen(self, value):
+        self.wait_for_presenter()
+
+        # Hide the cursor in fullscreen
+        mouse.set_visible(not value)
+
+        # Finally switch the mode
+        if value:
+            display.set_mode(DIMENSIONS, FULLSCREEN)
+        else:
+            display.set_mode(DIMENSIONS)
 
-        # Otherwise default behavior
-        self.__dict__[attr] = value
+        self.is_fullscreen = value
 
     # Loads resources for each game state
     def load_resources(self):
@@ -166,6 +244,7 @@ class Main:
 
     # Updates the resource counter and the progress bar
     def update_load_progress(self):
+        self.wait_for_presenter()
         self.resources_loaded += 1
         self.progress_rect.width = (float(self.resources_loaded) / self.total_resources) * self.progress_bar.get_width()
 
@@ -203,6 +282,10 @@ class Main:
             last_time += elapsed_time  # Make sure we don't "lose" any time
             self.clock.tick()
 
+            # Take care of anything the logic thread needed the main thread for
+            if self.logic_thread:
+                self.logic_thread.run_main_calls()
+
             # Grab all waiting events from the queue (unless we're inactive, in which
             # case just wait for an event, so we don't hog up the CPU)
             if self.active:
@@ -216,6 +299,9 @@ class Main:
                 elapsed_time = old_elapsed
                 last_time = time.get_ticks()
 
+            if self.latency_monitor.enabled:
+                self.latency_monitor.events_received()
+
             for next_event in events:
                 # Close window?
                 if next_event.type == QUIT:
@@ -250,9 +336,22 @@ class Main:
                     elif (keycode == K_f and key.get_mods() & KMOD_META) or (keycode == K_RETURN and key.get_mods() & KMOD_ALT) or keycode == K_F11:
                         self.fullscreen = not self.fullscreen
 
+                    # Latency measuring (Cmd-L for Macs, Ctrl-L for Windows)
+                    elif keycode == K_l and key.get_mods() & (KMOD_META | KMOD_CTRL):
+                        self.toggle_latency_monitor()
+
                     # Otherwise just hand it off to the current game state
                     elif self.state != STATE_LOADING:
-                        self.states[self.state].key_down(keycode, next_event.unicode)
+                        state_name = self.get_state_name()
+                        threaded = self.is_state_threaded()
+                        self.send_to_state('key_down', keycode, next_event.unicode)
+
+                        # (The logic thread times its own, once it gets to them)
+                        if self.latency_monitor.enabled and not threaded:
+                            self.latency_monitor.key_handled(state_name)
+
+                elif next_event.type == KEYUP and self.state != STATE_LOADING:
+                    self.send_to_state('key_up', next_event.key)
 
             # Are we still in the middle of the loading screen pause?
             if self.state == STATE_LOADING:
@@ -262,6 +361,7 @@ class Main:
                     self.load_wait -= elapsed_time
 
                     # Just blit the loading complete screen and get out of here
+                    self.wait_for_presenter()
                     self.draw_loading_screen(display.get_surface())
                     display.update()
                     continue
@@ -270,24 +370,134 @@ class Main:
             if self.active:
                 # Check if a screen transition is in place
                 if self.in_transition:
+                    # Key presses the logic thread got to in the meantime count
+                    # as shown now, same as when the state's run right here
+                    if self.latency_monitor.enabled and self.is_state_threaded():
+                        self.latency_monitor.keys_updated(self.logic_thread.take_published_keys())
+
+                    self.wait_for_presenter()  # Transitions draw straight to the screen
                     self.update_transition(elapsed_time)
+                    self.tick_time = 0  # Don't try to catch up on the transition afterwards
+                    self.swap_buffers()
 
-                # Otherwise, update normally
+                # Otherwise, update normally (in fixed ticks)
                 else:
-                    self.states[self.state].update(elapsed_time)
-                    self.states[self.state].draw()
+                    # If the logic thread's running the state, it's already been
+                    # updated, so just draw whatever it came up with last
+                    if self.is_state_threaded():
+                        drawn_state, self.interpolation, updated_keys = self.logic_thread.get_snapshot()
+
+                        if self.latency_monitor.enabled:
+                            self.latency_monitor.keys_updated(updated_keys)
+                    else:
+                        self.tick_time = min(self.tick_time + elapsed_time, MAX_FRAME_TIME)
+
+                        while self.tick_time >= LOGIC_TICK:
+                            self.states[self.state].update(LOGIC_TICK)
+                            self.tick_time -= LOGIC_TICK
+
+                        self.interpolation = float(self.tick_time) / LOGIC_TICK
+                        drawn_state = self.states[self.state]
+
+                    if self.latency_monitor.enabled:
+                        self.latency_monitor.mark_updated()
+
+                    drawn_state.draw()
+
+                    if self.latency_monitor.enabled:
+                        self.latency_monitor.mark_drawn()
 
                     # Draw frame rate
                     if self.prefs_controller.get(DRAW_FRAMERATE) or (key.get_pressed()[K_r] and
                       (key.get_mods() & KMOD_META or key.get_mods() & KMOD_CTRL)):
+                        fps_text = "Frame Rate: %.3f fps" % self.clock.get_fps()
+
+                        # Along with how well presenting is keeping up
+                        if self.presenter:
+                            fps_text += "   " + self.presenter.get_stats_text()
+
                         # Draw the frame rate plus a shadow so it can stand out on light backgrounds
-                        shadow = self.fps_font.render("Frame Rate: %.3f fps" % self.clock.get_fps(), True, (0, 0, 0))
-                        text = self.fps_font.render("Frame Rate: %.3f fps" % self.clock.get_fps(), True, (255, 255, 0))
-                        display.get_surface().blit(shadow, (6, 463))
-                        display.get_surface().blit(text, (5, 462))
+                        shadow = self.fps_font.render(fps_text, True, (0, 0, 0))
+                        text = self.fps_font.render(fps_text, True, (255, 255, 0))
+                        self.get_screen().blit(shadow, (6, 463))
+                        self.get_screen().blit(text, (5, 462))
+
+                    # Draw the latency measurements (just above the frame rate)
+                    if self.latency_monitor.enabled:
+                        latency_text = self.latency_monitor.get_overlay_text(self.get_state_name())
+                        self.get_screen().blit(self.fps_font.render(latency_text, True, (0, 0, 0)), (6, 447))
+                        self.get_screen().blit(self.fps_font.render(latency_text, True, (255, 255, 0)), (5, 446))
+
+                    # And get it on the screen
+                    if self.presenter:
+                        self.record_presented(self.presenter.present(self.latency_monitor.take_frame()))
+                    else:
+                        self.swap_buffers()
+
+    # Swaps the buffers, which is when whatever was drawn this frame actually shows up
+    def swap_buffers(self):
+        display.update()
+
+        if self.latency_monitor.enabled:
+            self.latency_monitor.frame_presented()
+
+    # Returns the surface that game states should draw the next frame onto: the
+    # screen, unless the presenter is taking care of that (see presenter.py)
+    def get_screen(self):
+        if self.presenter:
+            return self.presenter.get_surface()
+        else:
+            return display.get_surface()
+
+    # Waits for the presenter (if there is one) to finish putting every frame
+    # on the screen, before drawing on the screen directly
+    def wait_for_presenter(self):
+        if self.presenter:
+            self.record_presented(self.presenter.wait())
+
+    # Records the latencies of the frames the presenter says have made it to the
+    # screen. This happens here on the main thread, since that's where the
+    # latency monitor's measurements get read and cleared.
+    def record_presented(self, presented):
+        for frame, presented_time in presented:
+            self.latency_monitor.record_frame(frame, presented_time)
+
+    # Hands a key event off to the current game state, or queues it up for the
+    # logic thread if that's where the state is running (along with when it was
+    # received, if key presses are being timed)
+    def send_to_state(self, method, *args):
+        if self.is_state_threaded():
+            received = None
+
+            if self.latency_monitor.enabled and method == 'key_down':
+                received = self.latency_monitor.received
+
+            self.logic_thread.input.put((self.states[self.state], method, args, received))
+        else:
+            getattr(self.states[self.state], method)(*args)
+
+    # Checks if the current game state is being run by the logic thread
+    def is_state_threaded(self):
+        return self.logic_thread is not None and self.logic_thread.state is self.states[self.state]
 
-                # And swap the buffers
-                display.update()
+    # Checks if we're on the main thread (as opposed to the logic thread)
+    def on_main_thread(self):
+        return current_thread() is main_thread()
+
+    # Returns the name of the current game state, for the latency measurements
+    def get_state_name(self):
+        return self.states[self.state].__class__.__name__
+
+    # Starts measuring input latency, or stops and writes out the results
+    def toggle_latency_monitor(self):
+        self.wait_for_presenter()  # Get the frames that are still on their way in first
+
+        if self.latency_monitor.enabled:
+            self.latency_monitor.dump(LATENCY_FILE)
+        else:
+            self.latency_monitor.clear()
+
+        self.latency_monitor.enabled = not self.latency_monitor.enabled
 
     # Formats a millisecond counter into an actual, human-readable time display
     def time_to_str(self, millis):
@@ -378,8 +588,12 @@ class Main:
             while mixer.get_busy():
                 pass
 
-        # Clear any stray events from the queue
-        event.clear()
+        # Clear any stray events from the queue (the logic thread can't touch the
+        # event queue, so it just throws out the key events that got passed to it)
+        if self.on_main_thread():
+            event.clear()
+        else:
+            self.logic_thread.clear_input()
 
     # Initiates a screen transition. The end parameter designates
     # the surface that should be drawn at the end of the transition.
@@ -387,12 +601,23 @@ class Main:
     # at the time this is called, although you can pass in a custom
     # starting image. To get the end image, use a state's draw()
     # function, but make sure it doesn't draw to the screen. You can
-    # then pass the returned surface to this function.
+    # then pass the returned surface to this function. From the logic
+    # thread, pass a function that draws it instead, since drawing
+    # has to happen on the main thread.
     def transition_screen(self, type, end, start=None):
+        # Transitions run in the main loop, so they have to start there too
+        if not self.on_main_thread():
+            self.logic_thread.call_on_main_thread(self.transition_screen, type, end, start)
+            return
+
+        if callable(end):
+            end = end()
+
         self.end = end
 
         # Get the starting images
         if start is None:
+            self.wait_for_presenter()
             self.start = display.get_surface().copy()
         else:
             self.start = start
@@ -644,5 +869,13 @@ class Main:
 
     # Self-explanatory
     def quit(self):
+        # Don't lose any latency measurements
+        if self.latency_monitor.enabled:
+            self.latency_monitor.dump(LATENCY_FILE)
+
+        # Make sure the logic thread doesn't try to do anything after this
+        if self.logic_thread:
+            self.logic_thread.lock.acquire()
+
         pygame.quit()
         sys.exit()
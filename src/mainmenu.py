@@ -121,7 +121,7 @@ class MainMenu(GameState):
     streaming = False
 
     # Menu settings
-    mode = MODE_MAIN_MENU
+    current_mode = MODE_MAIN_MENU  # See the mode property
     current_bg = 0
     next_frame_wait = FRAME_DELAY
     selected = 0
@@ -138,16 +138,19 @@ class MainMenu(GameState):
     subtitle_font = None
     header_font = None
 
-    # Intercepts game mode changes to do a screen transition
-    def __setattr__(self, attr, value):
-        if attr == "mode":
-            # Don't transition unless we're transitioning from/to the main menu
-            if self.mode == MODE_MAIN_MENU or value == MODE_MAIN_MENU:
-                # Initiate transition
-                self.main.transition_screen(TRANSITION_RANDOM, self.draw(value, False))
+    # The current menu mode. Changing it does a screen transition.
+    @property
+    def mode(self):
+        return self.current_mode
 
-        # Normal behavior
-        self.__dict__[attr] = value
+    @mode.setter
+    def mode(self, value):
+        # Don't transition unless we're transitioning from/to the main menu
+        if self.mode == MODE_MAIN_MENU or value == MODE_MAIN_MENU:
+            # Initiate transition
+            self.main.transition_screen(TRANSITION_RANDOM, self.draw(value, False))
+
+        self.current_mode = value
 
     # Loads resources
     def load_resources(self):
@@ -940,13 +943,13 @@ class MainMenu(GameState):
                     x_offset = HELP_X_OFFSET
 
                     for type in NORMAL_TILES:
-                        current.reset(type)
+                        current.reset(type, (0, 0))
 
                         # Calculate x/y offsets
                         left_x, right_x, up_y, down_y = current.get_extremities()
 
-                        current.center_x -= left_x
-                        current.center_y -= up_y
+                        current.x -= left_x
+                        current.y -= up_y
 
                         # Draw the block
                         for block in current.get_blocks():
@@ -0,0 +1,99 @@
+#
+# 1337ris -- particles.py
+# Henry Weiss
+#
+# A simple particle system, for sprites that just fly across the screen in a
+# straight line until they're gone (like psychedelic mode's floating blocks).
+# Instead of a list of particle objects that gets rebuilt every frame, the
+# pool has a fixed number of slots, with the position and velocity of every
+# slot kept in parallel arrays. Used slots are kept in a list, and free ones
+# on a free list, so spawning or removing a particle never has to search.
+#
+# Since the pool never grows, it also puts a hard cap on how much updating
+# and drawing particles can cost each frame. If it's full, new particles
+# just don't show up.
+#
+
+from .headers import *
+
+# How many particles a pool holds, unless it's told otherwise
+DEFAULT_CAPACITY = 64
+
+class ParticlePool:
+    # Particles die once they leave the given (left, top, right, bottom) area
+    # in pixels (by default, once they're completely off the screen)
+    def __init__(self, capacity=DEFAULT_CAPACITY, bounds=None):
+        self.capacity = capacity
+        self.bounds = bounds or (-BLOCK_SIZE[0], -BLOCK_SIZE[1], SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.clear()
+
+    # Gets rid of every particle
+    def clear(self):
+        self.x = array('d', [0.0] * self.capacity)
+        self.y = array('d', [0.0] * self.capacity)
+        self.vx = array('d', [0.0] * self.capacity)  # Pixels per ms
+        self.vy = array('d', [0.0] * self.capacity)
+        self.sprites = [None] * self.capacity
+        self.active = []  # Slots in use, oldest first
+        self.free = list(range(self.capacity - 1, -1, -1))  # Slots not in use (next one at the end)
+
+    # Returns a copy of this pool that can be updated independently (the sprites
+    # are shared, of course)
+    def copy(self):
+        pool = ParticlePool.__new__(ParticlePool)
+        pool.capacity = self.capacity
+        pool.bounds = self.bounds
+        pool.x, pool.y = self.x[:], self.y[:]
+        pool.vx, pool.vy = self.vx[:], self.vy[:]
+        pool.sprites = self.sprites[:]
+        pool.active = self.active[:]
+        pool.free = self.free[:]
+
+        return pool
+
+    # How many particles are alive right now
+    def __len__(self):
+        return len(self.active)
+
+    # Starts a new particle at (x, y) moving at (vx, vy) pixels per ms. Returns
+    # its slot, or None if the pool is full.
+    def spawn(self, sprite, x, y, vx=0.0, vy=0.0):
+        if not self.free:
+            return None
+
+        i = self.free.pop()
+        self.x[i], self.y[i] = x, y
+        self.vx[i], self.vy[i] = vx, vy
+        self.sprites[i] = sprite
+        self.active.append(i)
+
+        return i
+
+    # Moves every particle along, and gets rid of the ones that have left the area
+    def update(self, elapsed_time):
+        if not self.active:
+            return
+
+        left, top, right, bottom = self.bounds
+        x, y, vx, vy = self.x, self.y, self.vx, self.vy
+        still_active = []
+
+        for i in self.active:
+            x[i] += vx[i] * elapsed_time
+            y[i] += vy[i] * elapsed_time
+
+            if left < x[i] < right and top < y[i] < bottom:
+                still_active.append(i)
+            else:
+                self.sprites[i] = None
+                self.free.append(i)
+
+        self.active = still_active
+
+    # Draws every particle in one go, moved over by offset (for when the pool's
+    # coordinates aren't the screen's, e.g. on a board that scrolls)
+    def draw(self, surface, offset=(0, 0)):
+        if self.active:
+            x, y, sprites = self.x, self.y, self.sprites
+            offset_x, offset_y = offset
+            surface.blits([(sprites[i], (int(x[i]) + offset_x, int(y[i]) + offset_y)) for i in self.active], False)
@@ -0,0 +1,74 @@
+#
+# 1337ris -- piecegenerator.py
+# Henry Weiss
+#
+# Decides which tetrominoes come next. Pieces come in "bags" of one of each
+# normal type, shuffled, with the occasional bomb or dynamite tacked on at
+# the end of the bag. The upcoming pieces are kept in a queue that's always
+# at least MAX_PREVIEW long, so taking the next piece or looking at the ones
+# after it never has to wait on a new bag.
+#
+# Each generator has its own random number generator, so giving it a seed
+# makes the whole sequence of pieces repeatable.
+#
+
+from .headers import *
+
+# Most upcoming pieces that can be previewed at once
+MAX_PREVIEW = 6
+
+# Bomb/dynamite probability per bag (bomb: 0-LOWER_BOUND, dynamite: LOWER_BOUND-UPPER_BOUND)
+LOWER_BOUND = 15
+UPPER_BOUND = 19
+
+class PieceGenerator:
+    # Starts a new sequence of pieces. Leave out the seed to get a random one.
+    def __init__(self, seed=None):
+        self.random = Random(seed)
+        self.queue = deque()
+        self.fill()
+
+    # Makes sure there are enough pieces queued up to preview
+    def fill(self):
+        while len(self.queue) <= MAX_PREVIEW:
+            self.queue.extend(self.make_bag())
+
+    # Returns a new shuffled bag of pieces
+    def make_bag(self):
+        bag = NORMAL_TILES[:]
+        self.random.shuffle(bag)
+
+        # Add the bomb or dynamite
+        selector = self.random.randint(1, 100)
+
+        if selector > LOWER_BOUND and selector < UPPER_BOUND:
+            bag.append('D')
+        elif selector < LOWER_BOUND:
+            bag.append('B')
+
+        return bag
+
+    # Takes the next piece off the queue
+    def pop(self):
+        type = self.queue.popleft()
+        self.fill()
+
+        return type
+
+    # Returns the next count pieces, without taking them off the queue
+    def peek(self, count=1):
+        return [self.queue[i] for i in range(count)]
+
+    # Sticks a piece at the front of the queue, so it comes next
+    def push(self, type):
+        self.queue.appendleft(type)
+
+    # Returns a copy of the queue for looking at (see TraditionalMode.take_snapshot()).
+    # It shares the random number generator with this one, so it shouldn't be
+    # popped from.
+    def copy(self):
+        generator = PieceGenerator.__new__(PieceGenerator)
+        generator.random = self.random
+        generator.queue = deque(self.queue)
+
+        return generator
@@ -5,6 +5,11 @@
 # Handles saving and loading game preferences. Preferences must
 # be manually saved in order to take affect.
 #
+# Since preferences get read all the time (some of them every frame), parsed
+# values are cached until something changes. The revision number goes up on
+# every change, so anything compiled from the preferences (like the game
+# modes' keymaps) can tell when it needs to be rebuilt.
+#
 
 import os, configparser
 
@@ -21,8 +26,14 @@ class PrefsController:
         # Initialize the prefs to include our section
         self.defaults = defaults
         self.prefs_file = prefs_file
-        self.prefs = configparser.RawConfigParser(self.defaults)
+
+        # The parser expects its defaults as strings, just like the values it
+        # reads in from the file (otherwise a bool pref that isn't in the file
+        # yet can't be parsed)
+        self.prefs = configparser.RawConfigParser(dict((key, str(value)) for key, value in self.defaults.items()))
         self.prefs.add_section(PREFS_SECTION)
+        self.cache = {}
+        self.revision = 0
 
         # Create the prefs file if it's not there
         if not os.access(self.prefs_file, os.F_OK):
@@ -33,26 +44,39 @@ class PrefsController:
 
     # Gets an attribute from the preferences
     def get(self, key):
+        if key in self.cache:
+            return self.cache[key]
+
         # Make sure the key is valid
         if key in self.defaults:
             if key.endswith('int'):
-                return self.prefs.getint(PREFS_SECTION, key)
+                value = self.prefs.getint(PREFS_SECTION, key)
             elif key.endswith('float'):
-                return self.prefs.getfloat(PREFS_SECTION, key)
+                value = self.prefs.getfloat(PREFS_SECTION, key)
             elif key.endswith('bool'):
-                return self.prefs.getboolean(PREFS_SECTION, key)
+                value = self.prefs.getboolean(PREFS_SECTION, key)
             else:
-                return self.prefs.get(PREFS_SECTION, key)
+                value = self.prefs.get(PREFS_SECTION, key)
+
+            self.cache[key] = value
+            return value
 
     # Sets an attribute in the preferences
     def set(self, key, value):
         # Make sure the key is valid
         if key in self.defaults:
             self.prefs.set(PREFS_SECTION, key, str(value))
+            self.changed()
+
+    # Throws out the cached values whenever the preferences change
+    def changed(self):
+        self.cache = {}
+        self.revision += 1
 
     # Reads in preferences from disk
     def load(self):
         self.prefs.read(self.prefs_file)
+        self.changed()
 
     # Saves the preferences to disk
     def save(self):
@@ -65,6 +89,8 @@ class PrefsController:
         for key in self.defaults.keys():
             self.prefs.remove_option(PREFS_SECTION, key)
 
+        self.changed()
+
     # Reverts to the default preferences
     def reset(self):
         for key in self.defaults.keys():
@@ -0,0 +1,121 @@
+#
+# 1337ris -- presenter.py
+# Henry Weiss
+#
+# Optionally takes putting frames on the screen off the main loop's hands.
+# Normally, display.update() blocks until the whole screen has been pushed
+# out, and the main loop can't do anything else in the meantime (and in
+# fullscreen, that's the single most expensive call in the whole frame).
+#
+# Instead, the main loop draws each frame into one of two back surfaces and
+# hands it to the presenter, whose own thread copies it to the screen and
+# swaps the buffers. Meanwhile, the main loop goes right on to the next frame,
+# drawing into the other back surface. It only has to wait if it finishes
+# that frame before the presenter is done with the last one.
+#
+# To see how well this works, the presenter keeps track of how long presenting
+# takes, and how long the main loop spends waiting on it. Whatever part of the
+# present it didn't have to wait for happened at the same time as the rest of
+# the frame.
+#
+
+from .headers import *
+
+# How much each new frame counts towards the running averages
+STATS_WEIGHT = 0.05
+
+class Presenter(Thread):
+    def __init__(self):
+        Thread.__init__(self)
+        self.daemon = True  # Don't keep the game running after the main thread's done
+
+        self.surfaces = [Surface(DIMENSIONS).convert(), Surface(DIMENSIONS).convert()]
+        self.back = 0  # Which of the surfaces is being drawn into
+
+        self.ready = Condition()
+        self.pending = None  # (surface, frame data) waiting to be presented
+        self.busy = False  # Whether a frame is being presented right now
+        self.presented = []  # (frame data, when it made it to the screen) not handed back yet
+
+        # Running averages, in ms
+        self.present_time = 0.0  # How long presenting a frame takes
+        self.wait_time = 0.0  # How long the main loop waits for the presenter each frame
+
+    # Returns the back surface that the next frame should be drawn into
+    def get_surface(self):
+        return self.surfaces[self.back]
+
+    # Hands off the frame that was just drawn into the back surface, and swaps
+    # over to the other one. Only waits if the last frame is still being presented.
+    # Any frame data (e.g. for the latency monitor) goes along with the frame,
+    # and comes back from here or wait() as (frame data, when it was presented)
+    # once it's on the screen, so whoever passed it in can deal with it on their
+    # own thread.
+    def present(self, frame=None):
+        start = perf_counter()
+
+        with self.ready:
+            while self.pending is not None or self.busy:
+                self.ready.wait()
+
+            self.pending = (self.surfaces[self.back], frame)
+            self.ready.notify_all()
+            presented = self.take_presented()
+
+        self.wait_time += ((perf_counter() - start) * 1000 - self.wait_time) * STATS_WEIGHT
+        self.back = 1 - self.back
+
+        return presented
+
+    # Waits until every frame handed off so far has made it to the screen, for
+    # when something needs to draw on the screen directly. Returns the frame
+    # data of the frames presented since last time, just like present().
+    def wait(self):
+        with self.ready:
+            while self.pending is not None or self.busy:
+                self.ready.wait()
+
+            return self.take_presented()
+
+    # Hands back the frame data presented so far (the condition has to be held)
+    def take_presented(self):
+        presented = self.presented
+        self.presented = []
+
+        return presented
+
+    # Returns how much of presenting a frame happens at the same time as the
+    # main loop, from 0 (none of it) to 1 (all of it)
+    def get_overlap(self):
+        if self.present_time <= 0:
+            return 0.0
+
+        return min(max(1 - self.wait_time / self.present_time, 0.0), 1.0)
+
+    # Returns a one-line summary of the stats, for the frame rate display
+    def get_stats_text(self):
+        return "Present: %.1f ms (%d%% overlapped)" % (self.present_time, self.get_overlap() * 100)
+
+    # Presents frames as they come in until the game quits
+    def run(self):
+        while True:
+            with self.ready:
+                while self.pending is None:
+                    self.ready.wait()
+
+                surface, frame = self.pending
+                self.pending = None
+                self.busy = True
+
+            start = perf_counter()
+            display.get_surface().blit(surface, (0, 0))
+            display.update()
+            presented = perf_counter()
+
+            with self.ready:
+                if frame is not None:
+                    self.presented.append((frame, presented))
+
+                self.present_time += ((presented - start) * 1000 - self.present_time) * STATS_WEIGHT
+                self.busy = False
+                self.ready.notify_all()
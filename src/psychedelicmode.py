@@ -15,26 +15,41 @@ PTS_PER_MOVE = 10
 PTS_PER_LEVEL = 5000  # Since you basically can't get lines in this thing
 ADDITIONAL_BOMB_CHANCES = 0.11
 
+# Timer names
+FLASH_TIMER = 'flash'
+FLOAT_TIMER = 'float'
+
 class PsychedelicMode(TraditionalMode):
     total_resources = 0
-    flash_delay = 0
-    check_delay = 0
-    floating_blocks = []
+    current_score = 0  # See the score property
+
+    # The flashing is all done when drawing, so the board keeps the real tile
+    # types. Every block gets drawn as palette[(cell code + its offset) % 7]: the
+    # offsets are random per cell and stay put, and the palette gets shuffled
+    # on every flash.
+    palette = NORMAL_TILES
+    flash_offsets = []
+
+    # Checks if we should advance to next level whenever the score changes
+    @property
+    def score(self):
+        return self.current_score
 
-    # Checks if we should advance to next level
-    def __setattr__(self, attr, value):
-        if attr == 'score':
-            # Next level?
-            if value >= self.level * PTS_PER_LEVEL:
-                self.level_clear()
+    @score.setter
+    def score(self, value):
+        # Next level? (Explosions can score enough for more than one at once)
+        while value >= self.level * PTS_PER_LEVEL:
+            self.level_clear()
 
-        self.__dict__[attr] = value
+        self.current_score = value
 
-    # Setup the flash delay
+    # Setup the flash and float timers
     def start(self, userdata=None):
-        self.floating_blocks = []
         TraditionalMode.start(self, userdata)
-        self.flash_delay = FLASH_DELAY
+        self.palette = NORMAL_TILES
+        self.flash_offsets = [bytearray([randrange(len(NORMAL_TILES)) for x in range(self.width)]) for y in range(self.height)]
+        self.timers.schedule(FLASH_TIMER, FLASH_DELAY, self.flash_blocks)
+        self.timers.schedule(FLOAT_TIMER, 0, self.float_block)
 
     # In psychedelic mode, blocks will randomly disappear or be added to the tetromino.
     def move_down(self):
@@ -45,14 +60,16 @@ class PsychedelicMode(TraditionalMode):
             if self.current.type == 'B' or self.current.type == 'D':
                 return True  # Explosives don't count
 
-            # Randomly add or remove piece
-            if random() < 0.5 and len(self.current.blocks) > 0:
-                del self.current.blocks[randint(0, len(self.current.blocks) - 1)]
+            # Randomly add or remove piece (but never the center block)
+            outer_blocks = len(self.current.get_offsets()) - 1
+
+            if random() < 0.5 and outer_blocks > 0:
+                self.current.remove_block(randint(1, outer_blocks))
                 return True
             else:
                 # Pick a block to add to
-                if len(self.current.blocks) > 0:
-                    x, y = self.current.blocks[randint(0, len(self.current.blocks) - 1)]
+                if outer_blocks > 0:
+                    x, y = self.current.get_blocks()[randint(1, outer_blocks)]
                 else:
                     x, y = self.current.center_x, self.current.center_y
 
@@ -63,77 +80,62 @@ class PsychedelicMode(TraditionalMode):
                 for loc in attempts:
                     if not self.block_will_collide((x + loc[0], y + loc[1])):
                         # Add it to the blocks
-                        self.current.blocks.append((x + loc[0], y + loc[1]))
+                        self.current.add_block((x + loc[0], y + loc[1]))
                         break
 
                 return True
 
         return False
 
-    # Make sure O's can reset
-    def reset(self):
-        self.current.reset(self.get_next_type(), DEFAULT_START_POINT, True)
+    # Since blocks change on every step, falling has to go one step at a time.
+    # Also, make sure O's can rotate.
+    def get_rules(self):
+        return Rules(self.height, self.get_spawn_point(), rotate_all=True, steps=True)
 
     # Psychedelic mode is pretty harsh, so we'll add a healthy dose of bombs
     def get_next_type(self, pop=True):
-        if pop and random() < ADDITIONAL_BOMB_CHANCES and len(self.next) > 0:
-            self.next.append('B')
+        if pop and self.pieces.random.random() < ADDITIONAL_BOMB_CHANCES:
+            self.pieces.push('B')
 
         return TraditionalMode.get_next_type(self, pop)
 
-    # In psychedelic mode, the tile grid flashes different colors
-    def update(self, elapsed_time):
-        TraditionalMode.update(self, elapsed_time)
-
-        # Update floating stuff
-        if not self.paused:
-            self.check_delay -= elapsed_time
+    # Every so often, maybe turn a block into a floating block, which floats away
+    # as a particle
+    def float_block(self):
+        self.timers.schedule(FLOAT_TIMER, randint(CHECK_DELAY_RANGE[0], CHECK_DELAY_RANGE[1]), self.float_block)
 
-            if self.check_delay <= 0:
-                self.check_delay = randint(CHECK_DELAY_RANGE[0], CHECK_DELAY_RANGE[1])
+        # Pick a random block and make it float
+        location = self.board.random_filled()
 
-                # Maybe turn some blocks into floating blocks?
-                available_blocks = []
+        if location:
+            x, y = location
 
-                for x in range(GRID_WIDTH):
-                    for y in range(GRID_HEIGHT):
-                        if self.tile_grid[int(x)][int(y)] != ' ' and not self.is_exploding_block(self.tile_grid[int(x)][int(y)]) and (x, y) not in self.floating_blocks:
-                            available_blocks.append((x, y))
+            self.particles.spawn(self.ghost_tiles[self.board.get(x, y)], x * BLOCK_SIZE[0], y * BLOCK_SIZE[1], 0, -FLOAT_SPEED)
+            self.board.set(x, y, ' ')
 
-                # Pick a random block and make it float
-                if len(available_blocks) > 0:
-                    x, y = available_blocks[randint(0, len(available_blocks) - 1)]
+            self.bomb_snd.play()
 
-                    self.floating_blocks.append((x * BLOCK_SIZE[0] + PIXEL_X_OFFSET, (y - self.grid_y_offset) * BLOCK_SIZE[1], self.tile_grid[int(x)][int(y)]))
-                    self.tile_grid[int(x)][int(y)] = ' '
+    # Psychedelia: the tile grid flashes different colors (by switching around
+    # the palette, see draw_row())
+    def flash_blocks(self):
+        self.timers.schedule(FLASH_TIMER, FLASH_DELAY, self.flash_blocks)
 
-                    self.bomb_snd.play()
+        # A new list every time, so snapshots keep the one they were taken with
+        self.palette = sample(NORMAL_TILES, len(NORMAL_TILES))
 
-            # Update the floating blocks
-            if len(self.floating_blocks) > 0:
-                for i in range(len(self.floating_blocks)):
-                    self.floating_blocks[i] = (self.floating_blocks[i][0], self.floating_blocks[i][1] - (FLOAT_SPEED * elapsed_time), self.floating_blocks[i][2])
+    # Draws the blocks in a row in whatever colors they're flashing right now
+    # (dynamite and exploding blocks don't flash)
+    def draw_row(self, surface, types, y):
+        row = self.board.rows[y]
+        offsets = self.flash_offsets[y]
+        palette = self.palette
 
-                for block in self.floating_blocks:
-                    # Remove?
-                    if block[1] <= -BLOCK_SIZE[1]:
-                        del block
+        for x in range(self.view_x, self.view_x + VIEW_COLS):
+            code = row[x]
 
-            # Psychedelia
-            self.flash_delay -= elapsed_time
-
-            if self.flash_delay <= 0:
-                self.flash_delay = FLASH_DELAY
-
-                # Go through the grid and switch around the types
-                for x in range(GRID_WIDTH):
-                    for y in range(GRID_HEIGHT):
-                        if self.tile_grid[int(x)][int(y)] != ' ' and self.tile_grid[int(x)][int(y)] != 'D' and not self.is_exploding_block(self.tile_grid[int(x)][int(y)]):
-                            self.tile_grid[int(x)][int(y)] = NORMAL_TILES[randint(0, len(NORMAL_TILES) - 1)]
-
-    # Draw the floating blocks too
-    def draw_blocks(self, surface):
-        for block in self.floating_blocks:
-            surface.blit(self.ghost_tiles[block[2]], (block[0], block[1]))
-
-        TraditionalMode.draw_blocks(self, surface)
+            if code == CELL_EMPTY:
+                continue
+            elif SOLID_CELLS[code]:
+                self.draw_block(surface, palette[(code + offsets[x]) % len(palette)], (x, y))
+            else:
+                self.draw_block(surface, types[code], (x, y))
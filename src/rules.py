@@ -0,0 +1,59 @@
+#
+# 1337ris -- rules.py
+# Henry Weiss
+#
+# Describes how a game mode plays, so that TraditionalMode can run every mode
+# with the same code instead of each mode overriding its own copy of the
+# gameplay loops. The board is split into one or more regions of rows, each
+# with its own direction of gravity: tetrominoes fall towards one edge of
+# their region, full lines get compacted towards that edge, and explosions
+# blow up everything from where they go off back out to the other edge.
+#
+# Other than that, the rules say where tetrominoes spawn, whether they fall
+# on their own at all, and whether falling has to go one step at a time (for
+# modes that do something on every step).
+#
+
+from .headers import *
+
+class Region:
+    __slots__ = ('start', 'end', 'gravity')
+
+    # Rows start through end - 1, where things fall down (1) or up (-1)
+    def __init__(self, start, end, gravity=1):
+        self.start = start
+        self.end = end
+        self.gravity = gravity
+
+    # Returns the range of rows (start_y, end_y) an explosion at row y blows up:
+    # from y all the way back to the edge things fall away from, except for the
+    # very last row.
+    def get_explosion_rows(self, y):
+        if self.gravity > 0:
+            return (self.start + 1, y + 1)
+        else:
+            return (y, self.end - 1)
+
+class Rules:
+    # Regions have to cover every row of the board, in order, without overlapping.
+    # Leave them out for one region where everything falls down.
+    def __init__(self, height, spawn_point, regions=None, rotate_all=False, falls=True, steps=False):
+        self.regions = regions or [Region(0, height)]
+        self.spawn_point = spawn_point
+        self.rotate_all = rotate_all  # Lets O's rotate too
+        self.falls = falls  # If not, tetrominoes stay put until they lock
+        self.steps = steps  # Falling has to go through move_down() one step at a time
+
+        # Which region each row is in, so looking it up is just an index
+        self.row_regions = []
+
+        for region in self.regions:
+            self.row_regions.extend([region] * (region.end - region.start))
+
+    # Returns the region a row is in
+    def get_region(self, y):
+        return self.row_regions[min(max(y, 0), len(self.row_regions) - 1)]
+
+    # Which way things fall at the given row (1 is down, -1 is up)
+    def get_gravity(self, y):
+        return self.get_region(y).gravity
@@ -0,0 +1,107 @@
+#
+# 1337ris -- scheduler.py
+# Henry Weiss
+#
+# A simple timer scheduler. Instead of every game state keeping its own pile
+# of delay variables and counting each one down by hand every frame, it can
+# schedule a named timer to go off after so many milliseconds, optionally
+# calling a function when it does. Timers are kept in a heap ordered by when
+# they go off, so advancing the clock only ever looks at the timers that are
+# actually due (on most frames, none of them), and the next time anything
+# will happen is always known up front.
+#
+# Scheduling a timer with the same name as a pending one replaces it. Since
+# the heap can't remove things from the middle, replaced/cancelled timers
+# just stay in the heap and get skipped when they come up.
+#
+
+from .headers import *
+
+class Scheduler:
+    def __init__(self):
+        self.clear()
+
+    # Cancels every timer and resets the clock
+    def clear(self):
+        self.time = 0  # Total milliseconds this scheduler has been advanced by
+        self.heap = []  # (deadline, sequence number, name), soonest first
+        self.timers = {}  # Name => (deadline, sequence number, callback) for pending timers
+        self.sequence = 0  # Keeps timers that go off at the same time in the order they were scheduled
+
+    # Schedules a timer to go off delay milliseconds from now, replacing any
+    # pending timer with the same name. The callback (if any) gets called
+    # with no arguments when it goes off.
+    def schedule(self, name, delay, callback=None):
+        deadline = self.time + delay
+        self.sequence += 1
+
+        self.timers[name] = (deadline, self.sequence, callback)
+        heappush(self.heap, (deadline, self.sequence, name))
+
+    # Returns a copy of this scheduler, with all the same timers pending
+    def copy(self):
+        scheduler = Scheduler.__new__(Scheduler)
+        scheduler.time = self.time
+        scheduler.heap = self.heap[:]
+        scheduler.timers = self.timers.copy()
+        scheduler.sequence = self.sequence
+
+        return scheduler
+
+    # Stops a timer from going off
+    def cancel(self, name):
+        if name in self.timers:
+            del self.timers[name]
+
+    # Checks if a timer is still waiting to go off
+    def pending(self, name):
+        return name in self.timers
+
+    # Returns how many milliseconds are left until a timer goes off (0 if it isn't pending)
+    def remaining(self, name):
+        if name in self.timers:
+            return self.timers[name][0] - self.time
+        else:
+            return 0
+
+    # Returns how many milliseconds until the next timer goes off, or None if
+    # there aren't any
+    def next_deadline(self):
+        self.discard_stale()
+
+        if self.heap:
+            return self.heap[0][0] - self.time
+        else:
+            return None
+
+    # Moves the clock forward, setting off any timers that are due, in the order
+    # they're due. While a callback runs, the clock reads the time its timer was
+    # due, so a timer that reschedules itself stays on the beat no matter how
+    # long the frames are.
+    def advance(self, elapsed_time):
+        end_time = self.time + elapsed_time
+
+        while True:
+            self.discard_stale()
+
+            if not self.heap or self.heap[0][0] > end_time:
+                break
+
+            deadline, sequence, name = heappop(self.heap)
+            callback = self.timers.pop(name)[2]
+            self.time = deadline
+
+            if callback:
+                callback()
+
+        self.time = end_time
+
+    # Pops off any timers at the top of the heap that were replaced or cancelled
+    def discard_stale(self):
+        while self.heap:
+            deadline, sequence, name = self.heap[0]
+
+            if name in self.timers and self.timers[name][1] == sequence:
+                return
+
+            heappop(self.heap)
@@ -27,32 +27,48 @@ class SoundController:
         # Global pausing
         self.paused = False
 
-    # Intercepts attribute changes
-    def __setattr__(self, attr, value):
-        # Sets the global volume for all of the sounds
-        if attr == "sound_volume":
-            for sound in self.sound_pool.values():
-                sound.set_volume(value)
-
-        # Sets the global volume for the music
-        elif attr == "music_volume":
-            for song in self.music_pool.values():
-                song.set_volume(value)
-
-            # In case we're actually streaming
-            music.set_volume(value)
-
-        # Pause/resume all sounds
-        elif attr == "paused":
-            if value:
-                mixer.pause()
-                music.pause()
-            else:
-                mixer.unpause()
-                music.unpause()
-
-        # Default behavior otherwise
-        self.__dict__[attr] = value
+    # Sets the global volume for all of the sounds
+    @property
+    def sound_volume(self):
+        return self.current_sound_volume
+
+    @sound_volume.setter
+    def sound_volume(self, value):
+        for sound in self.sound_pool.values():
+            sound.set_volume(value)
+
+        self.current_sound_volume = value
+
+    # Sets the global volume for the music
+    @property
+    def music_volume(self):
+        return self.current_music_volume
+
+    @music_volume.setter
+    def music_volume(self, value):
+        for song in self.music_pool.values():
+            song.set_volume(value)
+
+        # In case we're actually streaming
+        music.set_volume(value)
+
+        self.current_music_volume = value
+
+    # Pause/resume all sounds
+    @property
+    def paused(self):
+        return self.is_paused
+
+    @paused.setter
+    def paused(self, value):
+        if value:
+            mixer.pause()
+            music.pause()
+        else:
+            mixer.unpause()
+            music.unpause()
+
+        self.is_paused = value
 
     # Add a sound object to the pool
     def add_sound(self, sound, sound_id, is_music=False):
@@ -13,80 +13,144 @@
 #
 # A 'B' tile is a bomb, while a 'D' tile is dynamite.
 #
+# The shapes themselves are data-driven: every piece type has an entry in
+# the tables below, and all four of its orientations (plus their bounding
+# boxes, row masks and bottom profiles for the board's collision checks)
+# are precomputed once in a PieceShape. A Tetromino is then just a (type,
+# rotation, x, y) tuple pointing into that table, so moving or rotating one
+# never has to touch its blocks. To add a new kind of piece (pentominoes,
+# anyone?), just add it to the tables.
+#
 
 from .headers import *
 
-# Where all tetrominoes spawn from (well, most of them)
-DEFAULT_START_POINT = (GRID_WIDTH / 2 - 1, 3)
+# Row tetrominoes spawn on (the column depends on how wide the board is, see
+# TraditionalMode.get_spawn_point())
+SPAWN_ROW = 3
 
-class Tetromino:
-    center_x, center_y = DEFAULT_START_POINT
-    type = ''  # I, J, L, T, etc.
-    blocks = []  # Pairs of coordinates (x, y)
-    orientation = 0  # Primarily for the I tetromino
+# Each piece's blocks in its spawn orientation, relative to the center
+# block, which must always come first.
+PIECE_BLOCKS = {
+    'B': [(0, 0)],
+    'D': [(0, 0)],
+    'I': [(0, 0), (-1, 0), (1, 0), (-2, 0)],
+    'J': [(0, 0), (-1, -1), (-1, 0), (1, 0)],
+    'L': [(0, 0), (1, -1), (1, 0), (-1, 0)],
+    'O': [(0, 0), (1, 0), (0, -1), (1, -1)],
+    'S': [(0, 0), (1, -1), (0, -1), (-1, 0)],
+    'T': [(0, 0), (0, 1), (-1, 0), (1, 0)],
+    'Z': [(0, 0), (-1, -1), (0, -1), (1, 0)]
+}
+
+# Since 'I' tetrominoes don't really have a "center block," shifting the
+# piece a bit in each orientation will give the illusion that it's rotating
+# around its center. Indexed by orientation (0, 90, 180, 270).
+NO_KICKS = [(0, 0)] * 4
+PIECE_KICKS = {
+    'I': [(0, 0), (0, 1), (-1, 1), (-1, 0)]
+}
+
+# Adjustments to the start point to make some tetrominoes centered
+SPAWN_OFFSETS = {
+    'B': (1, -1),
+    'D': (1, -1),
+    'I': (1, -1),
+    'T': (0, -1)
+}
+
+# Rotates a block offset 90 degrees clockwise a certain number of times
+def rotate_offset(offset, turns):
+    dx, dy = offset
+
+    for i in range(turns % 4):
+        dx, dy = -dy, dx  # (x, y) rotated 90 degrees clockwise => (-y, x)
+
+    return (dx, dy)
+
+class PieceShape:
+    __slots__ = ('base', 'kicks', 'rotations', 'bounds', 'row_masks', 'bottoms', 'tops')
+
+    # Precomputes all four orientations of a shape. The base blocks are relative
+    # to the center block (which comes first), and the kicks are any extra shift
+    # applied in each orientation (see PIECE_KICKS).
+    def __init__(self, base, kicks=NO_KICKS):
+        self.base = tuple(base)
+        self.kicks = kicks
+        self.rotations = []
+        self.bounds = []
+        self.row_masks = []
+        self.bottoms = []
+        self.tops = []
+
+        for rot in range(4):
+            kick_x, kick_y = kicks[rot]
+            blocks = tuple((dx + kick_x, dy + kick_y) for dx, dy in [rotate_offset(block, rot) for block in self.base])
 
-    # Intercepts changes to the center block location to update
-    # the other blocks in the block list
-    def __setattr__(self, attr, value):
-        if attr.startswith("center_"):
-            dx, dy = 0, 0
+            # Bounding box, as (left, right, top, bottom) offsets
+            left = min([block[0] for block in blocks])
+            right = max([block[0] for block in blocks])
+            top = min([block[1] for block in blocks])
+            bottom = max([block[1] for block in blocks])
 
-            if attr == "center_x":
-                dx = value - self.center_x
-            elif attr == "center_y":
-                dy = value - self.center_y
+            # One bitmask per row the piece covers (bit 0 is the left edge of the
+            # bounding box), for the board's collision checks
+            masks = {}
 
-            for i in range(len(self.blocks)):
-                self.blocks[i] = (self.blocks[i][0] + dx, self.blocks[i][1] + dy)
+            for dx, dy in blocks:
+                masks[dy] = masks.get(dy, 0) | (1 << (dx - left))
 
-        self.__dict__[attr] = value
+            # The lowest and highest block in each column the piece covers, for
+            # working out how far it can drop or rise (see Board.landing_distance())
+            lowest = {}
+            highest = {}
+
+            for dx, dy in blocks:
+                lowest[dx] = max(lowest.get(dx, dy), dy)
+                highest[dx] = min(highest.get(dx, dy), dy)
+
+            self.rotations.append(blocks)
+            self.bounds.append((left, right, top, bottom))
+            self.row_masks.append(tuple(sorted(masks.items())))
+            self.bottoms.append(tuple(sorted(lowest.items())))
+            self.tops.append(tuple(sorted(highest.items())))
+
+    # Returns a new shape with an extra block, given as an offset in the
+    # specified orientation
+    def with_block(self, offset, rot):
+        kick_x, kick_y = self.kicks[rot]
+        return PieceShape(self.base + (rotate_offset((offset[0] - kick_x, offset[1] - kick_y), -rot),), self.kicks)
+
+    # Returns a new shape without the block at the given index
+    def without_block(self, index):
+        return PieceShape(self.base[:index] + self.base[index + 1:], self.kicks)
+
+# The precomputed shapes for every type
+PIECES = dict((type, PieceShape(PIECE_BLOCKS[type], PIECE_KICKS.get(type, NO_KICKS))) for type in PIECE_BLOCKS)
+SINGLE_BLOCK = PieceShape([(0, 0)])
+
+class Tetromino:
+    __slots__ = ('type', 'rot', 'x', 'y', 'shape', 'rotate_all')
+
+    # Starts out as a lone block in the corner until it's reset
+    def __init__(self):
+        self.type = ''  # I, J, L, T, etc.
+        self.rot = 0  # Orientation, in quarter turns clockwise
+        self.x, self.y = 0, 0
+        self.shape = SINGLE_BLOCK
+        self.rotate_all = False
 
     # Called whenever a new tetromino appears from the top. Setting
     # rotate_all to True lets the O tile rotate, even though it usually
     # shouldn't.
-    def reset(self, type, start=DEFAULT_START_POINT, rotate_all=False):
+    def reset(self, type, start, rotate_all=False):
+        dx, dy = SPAWN_OFFSETS.get(type, (0, 0))
+
         self.type = type
         self.rotate_all = rotate_all
-        self.orientation = 0
-        self.center_x, self.center_y = start
-
-        # Adjust to make some tetrominoes centered
-        if self.type == 'I' or self.type == 'T' or self.type == 'B' or self.type == 'D':
-            self.center_y -= 1
-        if self.type == 'I' or self.type == 'B' or self.type == 'D':
-            self.center_x += 1
-
-        # Now add the outside blocks
-        self.blocks = []
-
-        if self.type == 'I':
-            self.blocks.append((self.center_x - 1, self.center_y))
-            self.blocks.append((self.center_x + 1, self.center_y))
-            self.blocks.append((self.center_x - 2, self.center_y))
-        elif self.type == 'J':
-            self.blocks.append((self.center_x - 1, self.center_y - 1))
-            self.blocks.append((self.center_x - 1, self.center_y))
-            self.blocks.append((self.center_x + 1, self.center_y))
-        elif self.type == 'L':
-            self.blocks.append((self.center_x + 1, self.center_y - 1))
-            self.blocks.append((self.center_x + 1, self.center_y))
-            self.blocks.append((self.center_x - 1, self.center_y))
-        elif self.type == 'O':
-            self.blocks.append((self.center_x + 1, self.center_y))
-            self.blocks.append((self.center_x, self.center_y - 1))
-            self.blocks.append((self.center_x + 1, self.center_y - 1))
-        elif self.type == 'S':
-            self.blocks.append((self.center_x + 1, self.center_y - 1))
-            self.blocks.append((self.center_x, self.center_y - 1))
-            self.blocks.append((self.center_x - 1, self.center_y))
-        elif self.type == 'T':
-            self.blocks.append((self.center_x, self.center_y + 1))
-            self.blocks.append((self.center_x - 1, self.center_y))
-            self.blocks.append((self.center_x + 1, self.center_y))
-        elif self.type == 'Z':
-            self.blocks.append((self.center_x - 1, self.center_y - 1))
-            self.blocks.append((self.center_x, self.center_y - 1))
-            self.blocks.append((self.center_x + 1, self.center_y))
+        self.rot = 0
+        self.shape = PIECES[type]
+        self.x = start[0] + dx
+        self.y = start[1] + dy
 
     # Rotates the tetromino by a certain angle. If the specified
     # angle is not a multiple of 90, it will round down to the
@@ -99,66 +163,94 @@ class Tetromino:
 
         # Get an angle within the four quadrants
         angle = (angle - angle % 90) % 360
+        self.rot = (self.rot + angle // 90) % 4
 
-        # Rotate the blocks around the center
-        for i in range(int(angle / 90)):
-            for i in range(len(self.blocks)):
-                relative_x = self.blocks[i][0] - self.center_x
-                relative_y = self.blocks[i][1] - self.center_y
+    # Certain pieces don't rotate, so don't let them rotate
+    def can_rotate(self, type):
+        return (self.rotate_all or type != 'O') and type != 'B' and type != 'D'
 
-                # (x, y) rotated 90 degrees clockwise => (-y, x)
-                self.blocks[i] = (-relative_y + self.center_x, relative_x + self.center_y)
+    # The orientation, in degrees
+    @property
+    def orientation(self):
+        return self.rot * 90
 
-            # Update the orientation
-            self.orientation = (self.orientation + 90) % 360
+    # Location of the center block
+    @property
+    def center_x(self):
+        return self.x + self.shape.rotations[self.rot][0][0]
 
-            # Correct for the I tile
-            if self.type == 'I':
-                self.correct_for_i_tile()
+    @property
+    def center_y(self):
+        return self.y + self.shape.rotations[self.rot][0][1]
 
-    # Certain pieces don't rotate, so don't let them rotate
-    def can_rotate(self, type):
-        return (self.rotate_all or type != 'O') and type != 'B' and type != 'D'
+    # Adds a block (given in grid coordinates) to this tetromino
+    def add_block(self, location):
+        self.shape = self.shape.with_block((location[0] - self.x, location[1] - self.y), self.rot)
+
+    # Removes a block from this tetromino. The index is the same as in
+    # get_blocks(), so index 0 (the center block) can't be removed.
+    def remove_block(self, index):
+        if index > 0:
+            self.shape = self.shape.without_block(index)
+
+    # Gets the block offsets for the current orientation (center block first)
+    def get_offsets(self):
+        return self.shape.rotations[self.rot]
+
+    # Gets the row masks for the current orientation (see PieceShape)
+    def get_row_masks(self):
+        return self.shape.row_masks[self.rot]
+
+    # Gets the bottom profile for the current orientation (see PieceShape)
+    def get_bottoms(self):
+        return self.shape.bottoms[self.rot]
+
+    # Gets the top profile for the current orientation (see PieceShape)
+    def get_tops(self):
+        return self.shape.tops[self.rot]
 
-    # Since 'I' tetrominoes don't really have a "center block,"
-    # switching the location of the center block every rotation
-    # will give the illusion that it's rotating around its center.
-    def correct_for_i_tile(self):
-        if self.orientation == 0:
-            self.center_x += 1
-        elif self.orientation == 90:
-            self.center_y += 1
-        elif self.orientation == 180:
-            self.center_x -= 1
-        elif self.orientation == 270:
-            self.center_y -= 1
+    # Gets the bounding box offsets for the current orientation
+    def get_bounds(self):
+        return self.shape.bounds[self.rot]
 
     # Gets all the blocks plus the center block in one nice list
     def get_blocks(self):
-        return [(self.center_x, self.center_y)] + self.blocks
+        return [(self.x + dx, self.y + dy) for dx, dy in self.shape.rotations[self.rot]]
+
+    # Checks if any of this tetromino's blocks are in the same spot as any of
+    # another one's, by lining up their row masks
+    def overlaps(self, other):
+        left, right, top, bottom = self.get_bounds()
+        other_left, other_right, other_top, other_bottom = other.get_bounds()
+
+        # Can't overlap if the bounding boxes don't
+        if (self.x + right < other.x + other_left or other.x + other_right < self.x + left or
+                self.y + bottom < other.y + other_top or other.y + other_bottom < self.y + top):
+            return False
+
+        # How far to the right this one's masks start compared to the other one's
+        shift = (self.x + left) - (other.x + other_left)
+        masks = dict((self.y + dy, mask) for dy, mask in self.get_row_masks())
+
+        for dy, mask in other.get_row_masks():
+            row = masks.get(other.y + dy, 0)
+
+            if shift >= 0 and (row << shift) & mask or shift < 0 and row & (mask << -shift):
+                return True
+
+        return False
 
     # Returns the dimensions of this tetromino
     def get_size(self, in_pixels=False):
-        # Find left and rightmost blocks
-        left_x, right_x, up_y, down_y = self.get_extremities()
+        left, right, top, bottom = self.shape.bounds[self.rot]
 
         # Scale if necessary
         if in_pixels:
-            return (abs(left_x - right_x) * BLOCK_SIZE[0] + BLOCK_SIZE[0], abs(up_y - down_y) * BLOCK_SIZE[1] + BLOCK_SIZE[1])
+            return ((right - left + 1) * BLOCK_SIZE[0], (bottom - top + 1) * BLOCK_SIZE[1])
         else:
-            return (abs(left_x - right_x) + 1, abs(up_y - down_y) + 1)
+            return (right - left + 1, bottom - top + 1)
 
     # Returns left-most, right-most, top-most, and bottom-most block coordinates
     def get_extremities(self):
-        blocks = self.get_blocks()
-
-        left_x, right_x = GRID_WIDTH, 0
-        up_y, down_y = GRID_HEIGHT, 0
-
-        for block in blocks:
-            left_x = min(left_x, block[0])
-            right_x = max(right_x, block[0])
-            up_y = min(up_y, block[1])
-            down_y = max(down_y, block[1])
-
-        return (left_x, right_x, up_y, down_y)
+        left, right, top, bottom = self.shape.bounds[self.rot]
+        return (self.x + left, self.x + right, self.y + top, self.y + bottom)
@@ -16,6 +16,11 @@
 # the zillions of functions and members are pretty damn daunting, but at
 # least it's better than copypasta code.
 #
+# The basic differences between the modes (which way things fall, where
+# tetrominoes spawn, how lines compact and how far explosions reach) are
+# described by each mode's rules (see rules.py) instead, so the gameplay
+# loops here work for all of them without being overridden.
+#
 
 from .headers import *
 
@@ -26,6 +31,11 @@ from .headers import *
 # How many pixels to the right the grid is
 PIXEL_X_OFFSET = 80
 
+# How much of the board fits on the screen at once (in blocks), and where. Bigger
+# boards scroll to follow the tetromino around (see update_viewport()).
+VIEW_COLS, VIEW_ROWS = GRID_WIDTH, GRID_HEIGHT - GRID_Y_OFFSET
+FIELD_RECT = Rect(PIXEL_X_OFFSET, 0, VIEW_COLS * BLOCK_SIZE[0], VIEW_ROWS * BLOCK_SIZE[1])
+
 # Scoring (increases with each level). Based on Tetris DX's scoring system.
 SCORE_SINGLE = 40
 SCORE_DOUBLE = 100
@@ -38,13 +48,6 @@ SCORE_DROP = 2  # Per lines moved when dropped
 # Default rotation direction (counter-clockwise)
 DEFAULT_ROTATION = 90
 
-# For the explosions
-EXPLOSION_FRAMES = 10
-
-# Bomb/dynamite probability (bomb: 0-LOWER_BOUND, dynamite: LOWER_BOUND-UPPER_BOUND)
-LOWER_BOUND = 15
-UPPER_BOUND = 19
-
 # Amount of tiles bombed/detonated that is equivalent to one line, scoring-wise
 TILES_BOMBED_FOR_LINE = 20
 TILES_DETONATED_FOR_LINE = 40  # Dynamite
@@ -65,11 +68,14 @@ DETECT_VERT = 1 << 1
 INITIAL_DELAY = 850  # Also used for sliding
 TILE_DELAY_INCREMENT = 40
 BLOCKS_CLEARED_DELAY = 750
-GAME_KEY_DELAY = 150
-GAME_KEY_REPEAT = 30
 DROP_DELAY = 350
 SPEED_DELAY = 300
 
+# Timer names (see scheduler.py)
+DROP_TIMER = 'drop'  # Keeps a new tetromino still for a moment after it appears
+SPEED_TIMER = 'speed'  # Similar purpose as the drop timer
+CLEAR_TIMER = 'clear'  # While line(s) are flashing or blocks are exploding
+
 # Resources
 TOTAL_BGS = 10
 TOTAL_SONGS = 5
@@ -95,11 +101,18 @@ GAME_OVER_COLOR = (205, 0, 0)
 GAME_OVER_SHADOW_COLOR = (0, 0, 0)
 PAUSE_FONT_COLOR = (255, 255, 255)
 
+# Where the previews after the first one go (they're shrunk down to fit)
+SMALL_PREVIEW_SCALE = 0.5
+SMALL_PREVIEW_X = 582
+SMALL_PREVIEW_Y = 40
+SMALL_PREVIEW_SPACING = 56
+
 # Other stuff
 LOCK_DELAY_MAX_ALPHA = 254  # Highest opacity during the "about to lock" warning
 
 class TraditionalMode(GameState):
     total_resources = 9 + TOTAL_BGS + TOTAL_SONGS + EXPLOSION_FRAMES + len(TILES) * 2  # Accounts for both blocks and previews
+    supports_logic_thread = True
 
     # Resources
     songs = [None] * TOTAL_SONGS
@@ -109,6 +122,7 @@ class TraditionalMode(GameState):
     tiles = {}
     ghost_tiles = {}
     tile_previews = {}
+    small_tile_previews = {}
     paused_snd = None
     move_snd = None
     rotate_snd = None
@@ -121,9 +135,12 @@ class TraditionalMode(GameState):
     pause_font = None
 
     # Game variables
-    tile_grid = []
+    board = None
+    rules = None  # How this mode plays (see rules.py)
     current = Tetromino()
-    next = []
+    pieces = None  # Upcoming tetrominoes (see piecegenerator.py)
+    particles = None  # For effects (see particles.py)
+    preview_count = 1
     level = 1
     paused = False
     game_over = False
@@ -139,6 +156,43 @@ class TraditionalMode(GameState):
     # For sliding at the last minute before a tetromino settles
     sliding = False
 
+    # Keycode => handler for gameplay keys, compiled from the prefs (see build_keymap())
+    keymap = {}
+    keymap_revision = -1
+
+    # Which of the "hold down" keys (speedup, drop) are down this frame
+    held = frozenset()
+    held_keycodes = []
+
+    # Autoshift (holding down a movement key makes it repeat). SDL's key repeat
+    # only goes as fast as the frame rate and gets lost whenever events are
+    # cleared, so instead we keep track of how long the key's been held down.
+    autoshift_keycodes = []
+    shift_keys = []  # Autoshift keys currently held down, most recent last
+    shift_time = 0  # How long the most recent one has been held down for
+    shifts_done = 0  # How many times it's repeated so far
+
+    # Gameplay keys pressed while the tetromino can't move (i.e. during the drop
+    # and clear delays), as (time pressed, keycode), played back once it can.
+    # Instead of throwing those presses away, this way the next tetromino can be
+    # rotated/shifted before it even starts falling.
+    input_buffer = []
+    drop_keycode = None
+    last_drop_time = 0  # When the last hard drop happened, to catch accidental double drops
+
+    # Where the current tetromino would land, cached until it moves, rotates, or
+    # the board changes (see get_ghost_offset())
+    ghost_key = None
+    ghost_offset = 0
+
+    # Copy of the board for snapshots, shared by every snapshot until the board
+    # changes (see get_snapshot_board())
+    snapshot_board = None
+
+    # Top-left corner of the part of the board that's on the screen
+    view_x = 0
+    view_y = 0
+
     # Timing stuff
     tile_delay = 0
     tile_delay_increment = 0
@@ -146,18 +200,17 @@ class TraditionalMode(GameState):
     slide_delay = 0
     sped_up_delay = 0  # For when the user holds down to speed up drops
     time_since_last_move = 0  # Keeps track of when to move the current tetromino down
-    drop_delay = 0  # Prevents people from dropping inadvertantly due to fast key repeat
-    speed_delay = 0  # Similar purpose as drop_delay
 
     #
     # Initialization routines
     #
 
-    # Specifies the grid size. Useful for subclasses.
-    def __init__(self, main, size=GRID_SIZE):
-        self.size = GRID_SIZE
+    # Specifies the grid size. Useful for subclasses. This is just the size until
+    # the first game starts; after that, it comes from the prefs (see get_board_size()).
+    def __init__(self, main, size=GRID_SIZE, grid_y_offset=GRID_Y_OFFSET):
+        self.size = size
         self.width, self.height = self.size
-        self.grid_y_offset = GRID_Y_OFFSET
+        self.grid_y_offset = grid_y_offset
 
         # Redefine this variable
         self.full_lines = [False] * self.height
@@ -191,6 +244,11 @@ class TraditionalMode(GameState):
             self.tiles[key] = self.load_resource(IMG_PATH + "blocks/" + key.lower() + ".png", RES_TYPE_IMAGE)
             self.tile_previews[key] = self.load_resource(IMG_PATH + "blocks/" + key.lower() + " preview.png", RES_TYPE_IMAGE)
 
+            # Shrink the preview once now for the previews further down the queue
+            preview = self.tile_previews[key].convert_alpha()
+            size = (int(preview.get_width() * SMALL_PREVIEW_SCALE), int(preview.get_height() * SMALL_PREVIEW_SCALE))
+            self.small_tile_previews[key] = transform.smoothscale(preview, size)
+
             # Create ghost tiles by halving each tile's alpha. Done per-pixel
             # if the image already has an alpha channel defined.
             if self.tiles[key].get_alpha() is None:
@@ -243,20 +301,24 @@ class TraditionalMode(GameState):
         self.tile_delay_increment = TILE_DELAY_INCREMENT
         self.min_tile_delay = 0
         self.time_since_last_move = 0
-        self.blocks_cleared_delay = 0
+        self.timers.clear()
         self.clear_event = EVENT_NONE
         self.game_over = False
         self.paused = False
 
-        # Clear the game grid
-        self.tile_grid = []
-
-        for x in range(self.width):
-            col = [' '] * self.height
-            self.tile_grid.append(col)
+        # Clear the game grid (which might be a different size this time)
+        self.size = self.get_board_size()
+        self.width, self.height = self.size
+        self.full_lines = [False] * self.height
+        self.rules = self.get_rules()
+        self.board = Board(self.size, self.rules.regions)
+        self.snapshot_board = None
+        self.particles = ParticlePool(bounds=(-BLOCK_SIZE[0], -BLOCK_SIZE[1], self.width * BLOCK_SIZE[0], self.height * BLOCK_SIZE[1]))
+        self.ghost_key = None
 
-        # Reset the next tetromino stack
-        self.next = []
+        # Start a new sequence of tetrominoes (a seed of 0 means a random one)
+        self.pieces = PieceGenerator(self.main.prefs_controller.get(PIECE_SEED) or None)
+        self.preview_count = min(max(self.main.prefs_controller.get(PREVIEW_COUNT), 1), MAX_PREVIEW)
 
         # Generate a new tetromino
         self.reset()
@@ -264,11 +326,74 @@ class TraditionalMode(GameState):
         # Start the music
         self.start_music()
 
-        # Set key repeat to gameplay settings
-        key.set_repeat(GAME_KEY_DELAY, GAME_KEY_REPEAT)
+        # No key repeat, since we do our own autoshifting
+        key.set_repeat()
+
+        # Get the controls ready
+        self.build_keymap()
+        self.held = frozenset()
+        self.shift_keys = []
+        self.input_buffer = []
+        self.last_drop_time = -DROP_DELAY
+
+    # Returns the size of the board for a new game: as big as the prefs say (but
+    # at least big enough to fill the screen), plus the hidden rows at the top
+    def get_board_size(self):
+        prefs = self.main.prefs_controller
+        width = min(max(prefs.get(BOARD_WIDTH), VIEW_COLS), MAX_BOARD_SIZE[0])
+        height = min(max(prefs.get(BOARD_HEIGHT), VIEW_ROWS), MAX_BOARD_SIZE[1])
+
+        return (width, height + self.grid_y_offset)
+
+    # Returns the rules for this mode (see rules.py). In the traditional mode,
+    # it's one region where everything falls down.
+    def get_rules(self):
+        return Rules(self.height, self.get_spawn_point())
+
+    # Tetrominoes start out near the top, in the middle of the board
+    def get_spawn_point(self):
+        return (self.width // 2 - 1, SPAWN_ROW)
+
+    # Compiles the keymap from the key prefs, so gameplay input is just a dict
+    # lookup instead of a bunch of prefs lookups. Only does anything if the
+    # prefs have changed since the last time.
+    def build_keymap(self):
+        prefs = self.main.prefs_controller
+
+        if self.keymap_revision == prefs.revision:
+            return
 
-        # Clear any stray events (players will thank me later, XD)
-        event.clear()
+        self.keymap = {}
+
+        # Going backwards so that if two actions share a key, the first one wins
+        for pref, handler in reversed(self.get_key_handlers()):
+            self.keymap[prefs.get(pref)] = handler
+
+        self.held_keycodes = [(pref, prefs.get(pref)) for pref in (SPEEDUP_KEY, DROP_KEY)]
+        self.autoshift_keycodes = [prefs.get(pref) for pref in self.get_autoshift_keys()]
+        self.drop_keycode = prefs.get(DROP_KEY)
+        self.das_delay = prefs.get(DAS_DELAY)
+        self.arr = prefs.get(ARR)
+        self.keymap_revision = prefs.revision
+
+    # Returns (key pref, handler) pairs for all the gameplay keys
+    def get_key_handlers(self):
+        return [(MOVE_LEFT_KEY, self.handle_left_key),
+                (MOVE_RIGHT_KEY, self.handle_right_key),
+                (ROTATE_RIGHT_KEY, self.handle_rotate_right_key),
+                (ROTATE_LEFT_KEY, self.handle_rotate_left_key),
+                (DROP_KEY, self.handle_drop_key),
+                (DETONATE_KEY, self.handle_detonate_key)]
+
+    # Returns the key prefs for the keys that autoshift when held down
+    def get_autoshift_keys(self):
+        return [MOVE_LEFT_KEY, MOVE_RIGHT_KEY]
+
+    # Takes a snapshot of which hold-down keys are down, so the rest of the frame
+    # doesn't have to keep asking pygame
+    def update_held_keys(self):
+        pressed = key.get_pressed()
+        self.held = frozenset([pref for pref, keycode in self.held_keycodes if pressed[keycode]])
 
     # Plays the first song for the first level
     def start_music(self):
@@ -293,14 +418,23 @@ class TraditionalMode(GameState):
     # Attempts to move a tetromino down, and will clear lines if so.
     # Returns true if the tetromino was able to move down.
     def move_down(self):
-        # If a line is cleared, then the next piece should be delayed
-        should_get_next_piece = False
-        blocks = self.current.get_blocks()
+        # Check if the currently moving tetromino collided with any blocks
+        if self.piece_will_collide(self.current, 0, 1):
+            return self.lock_tetromino()
 
-        # If this is a bomb, check if we hit anything
-        if self.current.type == 'B' and self.block_will_collide((self.current.center_x, self.current.center_y + 1)):
-            # Insert bomb tile into the grid
-            self.tile_grid[int(self.current.center_x)][int(self.current.center_y)] = 'B'
+        # If a line clears, then this should return false as well
+        return self.handle_line_clears(False)
+
+    # Takes the current tetromino and incorporates it into the playing field (or
+    # sets it off, if it's a bomb). Returns false, since it's not moving anymore.
+    def lock_tetromino(self):
+        # Without gravity, the lock delay is all there is, so it starts over for the next one
+        if not self.rules.falls:
+            self.time_since_last_move = 0
+
+        if self.current.type == 'B':
+            # Insert the bomb into the grid (it blows up right away)
+            self.board.explode(self.current.center_x, self.current.center_y)
 
             # Bombs clear the line they hit and anything above it...
             # 20 tiles cleared make one line (defined as constant).
@@ -308,29 +442,21 @@ class TraditionalMode(GameState):
             self.bomb_snd.play()
 
             # Update some stuff
-            self.blocks_cleared_delay = BLOCKS_CLEARED_DELAY
+            self.start_clear_delay()
             self.clear_event = EVENT_BOMB
 
             # We stopped moving, so...yeah
             return False
 
-        # Otherwise, check if the currently moving tetromino collided with any blocks
-        else:
-            blocks = self.current.get_blocks()
-
-            for block in blocks:
-                if self.block_will_collide((block[0], block[1] + 1), DETECT_VERT):
-                    # Add the tiles to the tile grid and get a new tetromino
-                    for new_block in blocks:
-                        self.tile_grid[int(new_block[0])][int(new_block[1])] = self.current.type
+        # Add the tiles to the tile grid
+        for block in self.current.get_blocks():
+            self.board.set(block[0], block[1], self.current.type)
 
-                    # Since the tetromino is now part of the grid, get a new tetromino right away
-                    self.lock_snd.play()
-                    should_get_next_piece = True
-                    break
+        # Since the tetromino is now part of the grid, get a new tetromino right away
+        # (unless a line clears, which has to wait until it's done flashing)
+        self.lock_snd.play()
 
-        # If a line clears, then this should return false as well
-        return self.handle_line_clears(should_get_next_piece)
+        return self.handle_line_clears(True)
 
     # Handle what happens if lines clear
     def handle_line_clears(self, should_get_next_piece):
@@ -343,7 +469,7 @@ class TraditionalMode(GameState):
             else:
                 self.line_clear_snd.play()
 
-            self.blocks_cleared_delay = BLOCKS_CLEARED_DELAY  # Delay to flash a bit
+            self.start_clear_delay()  # Delay to flash a bit
             self.clear_event = EVENT_LINE_CLEAR
 
             return False  # Didn't move down!
@@ -355,7 +481,7 @@ class TraditionalMode(GameState):
             return False  # Didn't move down!
 
         # Otherwise, just move the piece down
-        self.current.center_y += 1
+        self.current.y += 1
         self.check_for_sliding()  # If a piece locks, we want it to delay more than usual
 
         return True
@@ -365,15 +491,8 @@ class TraditionalMode(GameState):
         lines_cleared = 0
 
         for y in range(self.grid_y_offset, self.height):
-            line_filled = True
-
-            for x in range(self.width):
-                # Empty/exploding/dynamite tiles don't count
-                if self.tile_grid[int(x)][int(y)] == ' ' or self.tile_grid[int(x)][int(y)] == 'D' or self.tile_grid[int(x)][int(y)] == '1':
-                    line_filled = False
-
-            # Otherwise...line cleared!
-            if line_filled:
+            # Empty/exploding/dynamite tiles don't count (the board takes care of that)
+            if self.board.is_full_row(y):
                 lines_cleared += 1
                 self.full_lines[y] = True
 
@@ -382,32 +501,27 @@ class TraditionalMode(GameState):
     # Does what it says
     def check_game_over(self):
         if self.current.type != 'B':  # How can you get topout with a bomb?
-            for block in self.current.get_blocks():
-                if self.block_will_collide(block):
-                    self.game_over = True  # :(
-                    self.main.fadeout_sound()
+            if self.piece_will_collide(self.current):
+                self.game_over = True  # :(
+                self.main.fadeout_sound()
 
     # Moves a tetromino in a certain direction horizontally. Returns whether or not the move was successful.
     def move_horiz(self, tetromino, dx):
         # If bomb or dynamite, just check to see if there is anything to the left of this tile.
         if ((tetromino.type == 'B' or tetromino.type == 'D') and not self.block_will_collide((tetromino.center_x + dx, tetromino.center_y))):
             self.move_snd.play()
-            tetromino.center_x += dx
+            tetromino.x += dx
 
             return True
 
         # Otherwise, we'll have to make sure the hard way
         else:
-            can_move = True
-
-            # Collision detection, somewhat...
-            for block in tetromino.get_blocks():
-                if self.block_will_collide((block[0] + dx, block[1])):
-                    can_move = False  # Out of bounds, or tile is in the way
+            # Out of bounds, or tile is in the way?
+            can_move = not self.piece_will_collide(tetromino, dx, 0)
 
             if can_move:
                 self.move_snd.play()
-                tetromino.center_x += dx
+                tetromino.x += dx
 
             self.check_for_sliding()
             return can_move
@@ -427,10 +541,8 @@ class TraditionalMode(GameState):
             self.current.rotate(angle)
 
             # Check if we're out of bounds
-            for block in self.current.get_blocks():
-                if self.block_will_collide(block):
-                    self.current.rotate(-angle)  # Revert the rotation!
-                    break
+            if self.piece_will_collide(self.current):
+                self.current.rotate(-angle)  # Revert the rotation!
 
     # Checks if a block at the given location will collide if moved in a certain direction.
     # You can exclude certain directions to check by passing a different set of flags
@@ -439,53 +551,41 @@ class TraditionalMode(GameState):
         new_x, new_y = location
         return ((flags & DETECT_HORIZ and (new_x < 0 or new_x >= self.width)) or
                 (flags & DETECT_VERT and (new_y < 0 or new_y >= self.height)) or
-                self.tile_grid[int(new_x)][int(new_y)] != ' ')
+                self.board.is_blocked(new_x, new_y))
 
-    # Resets the current tetromino to the next tetromino in the current stack
+    # Checks if a whole tetromino will collide with anything if it's moved by (dx, dy).
+    # Much faster than calling block_will_collide() for each block, since the board
+    # can test the tetromino's precomputed row masks against its rows in one go.
+    def piece_will_collide(self, tetromino, dx=0, dy=0):
+        return self.board.collides_masks(tetromino.get_row_masks(), tetromino.get_bounds(), tetromino.x + dx, tetromino.y + dy)
+
+    # Resets the current tetromino to the next tetromino in the queue
     def reset(self):
-        self.current.reset(self.get_next_type())
+        self.current.reset(self.get_next_type(), self.rules.spawn_point, self.rules.rotate_all)
 
-    # Returns a random tetromino ID char from the current stack of tetrominoes.
-    # If there are no more tetrominoes left, a new stack is generated.
-    # (Specify pop as False if you don't want to modify the stack.)
+    # Returns the tetromino ID char of the next tetromino, taking it off the
+    # queue of upcoming ones. (Specify pop as False if you just want to look.)
     def get_next_type(self, pop=True):
-        # Generate a new tetromino list if there's none left
-        if len(self.next) < 1:
-            while len(self.next) < len(NORMAL_TILES):
-                selector = randint(0, len(NORMAL_TILES) - 1)
-
-                if not NORMAL_TILES[selector] in self.next:
-                    self.next.append(NORMAL_TILES[selector])
-
-            # Add the bomb or dynamite
-            selector = randint(1, 100)
-
-            # Reverse the lists after adding the bomb/dynamite
-            # so it isn't popped off first.
-            if selector > LOWER_BOUND and selector < UPPER_BOUND:
-                self.next.append('D')
-                self.next.reverse()
-            elif selector < LOWER_BOUND:
-                self.next.append('B')
-                self.next.reverse()
-
         if pop:
             # This means we're in a reset, so ignore the input for a bit so the player
             # doesn't accidentally drop too fast.
-            self.speed_delay = SPEED_DELAY
+            speed_delay = SPEED_DELAY
 
             # Ignore input for a short instant to prevent inadvertant drops (players
             # will thank me later, XD), unless there's a line clear.
             if self.clear_event == EVENT_NONE:
-                self.drop_delay = DROP_DELAY
+                self.timers.schedule(DROP_TIMER, DROP_DELAY)
+                speed_delay += DROP_DELAY  # Don't start counting until the drop delay's over
 
-            return self.next.pop()
+            self.timers.schedule(SPEED_TIMER, speed_delay)
+
+            return self.pieces.pop()
         else:
-            return self.next[len(self.next) - 1]
+            return self.pieces.peek()[0]
 
     # Finalization method to clear blocks from the screen after line(s) clears.
     def clear_lines(self):
-        self.blocks_cleared_delay = 0
+        self.timers.cancel(CLEAR_TIMER)
 
         # Update the grid and take care of scoring
         lines_cleared = self.adjust_full_lines()
@@ -514,23 +614,24 @@ class TraditionalMode(GameState):
     def update_lines(self, lines_cleared):
         self.lines += lines_cleared
 
-        if int((self.lines / 10) + 1) > self.level:
+        if self.lines // 10 + 1 > self.level:
             # Woo, level cleared
             self.level_clear()
 
-    # Moves all full ines up a notch. Returns total number of lines cleared
+    # Gets rid of all the full lines, moving everything else in their region
+    # over the way things fall. Returns total number of lines cleared
     def adjust_full_lines(self):
         lines_cleared = 0
 
-        for i in range(self.height):
-            if self.full_lines[i]:
-                lines_cleared += 1
-                self.full_lines[i] = False
+        for region in self.rules.regions:
+            full = [y for y in range(region.start, region.end) if self.full_lines[y]]
 
-                # Move down each line before it
-                for x in range(self.width):
-                    for y in range(i, 0, -1):
-                        self.tile_grid[int(x)][int(y)] = self.tile_grid[int(x)][int(y - 1)]
+            if full:
+                lines_cleared += len(full)
+                self.board.remove_rows(full, region.start, region.end, region.gravity)
+
+                for y in full:
+                    self.full_lines[y] = False
 
         return lines_cleared
 
@@ -558,69 +659,51 @@ class TraditionalMode(GameState):
     # Detonates the top-left most dynamite tile and, with it,
     # the line it is on and everything above it.
     def detonate(self):
-        for y in range(self.grid_y_offset, self.height):
-            for x in range(self.width):
-                # Remove dynamite tiles and blow up stuff
-                if self.tile_grid[int(x)][int(y)] == 'D':
-                    # Dynamite clears the line its on and anything above it...
-                    # 40 tiles cleared make one line (defined as constant).
-                    self.explode_blocks(y, SCORE_BOMB, TILES_DETONATED_FOR_LINE)
-                    self.bomb_snd.play()
+        dynamite = self.board.find_dynamite(self.grid_y_offset)
 
-                    # Update some stuff and bail out, since we've detonated already
-                    self.blocks_cleared_delay = BLOCKS_CLEARED_DELAY
-                    self.clear_event = EVENT_DYNAMITE
+        if dynamite:
+            # Dynamite clears the line its on and anything above it...
+            # 40 tiles cleared make one line (defined as constant).
+            self.explode_blocks(dynamite[1], SCORE_BOMB, TILES_DETONATED_FOR_LINE)
+            self.bomb_snd.play()
 
-                    return
+            # Update some stuff
+            self.start_clear_delay()
+            self.clear_event = EVENT_DYNAMITE
 
-    # Makes all blocks go boom from the top of the screen to the specified y location.
+    # Makes all blocks go boom from the top of the region (well, wherever things
+    # fall from) to the specified y location. Every block blown up is worth some
+    # points, and every blocks_per_line + 1 of them count as a line.
     def explode_blocks(self, y_offset, score_per_block, blocks_per_line):
-        blocks_cleared = 0
+        start_y, end_y = self.rules.get_region(y_offset).get_explosion_rows(y_offset)
+        blocks_cleared = self.board.explode_rows(start_y, end_y)
 
-        for y in range(y_offset, 0, -1):
-            for x in range(self.width):
-                if self.tile_grid[int(x)][int(y)] != ' ':
-                    # Award some points
-                    self.score += score_per_block * self.level
-
-                    # And maybe a line too...
-                    blocks_cleared += 1
-
-                    if blocks_cleared > blocks_per_line:
-                        self.lines += 1
-                        blocks_cleared = 0
-
-                    self.tile_grid[int(x)][int(y)] = '1'  # Make affected tile explode
+        self.score += score_per_block * self.level * blocks_cleared
+        self.lines += blocks_cleared // (blocks_per_line + 1)
 
     # Kind of the "clean up" version of the above
     def clear_detonated_blocks(self):
-        for x in range(self.width):
-            for y in range(self.height):
-                if self.is_exploding_block(self.tile_grid[int(x)][int(y)]):
-                    self.tile_grid[int(x)][int(y)] = ' '
+        self.board.clear_exploding()
 
-    # Checks to see if we are currently sliding or not
+    # Checks to see if we are currently sliding or not. Without gravity, it's
+    # always sliding, since it locks wherever it is once the delay runs out.
     def check_for_sliding(self):
-        if key.get_pressed()[self.main.prefs_controller.get(DROP_KEY)] or key.get_pressed()[self.main.prefs_controller.get(SPEEDUP_KEY)]:
+        if not self.rules.falls:
+            self.sliding = True
+            return
+
+        if self.held:  # Holding down either speedup or drop
             self.sliding = False
             return
 
-        for block in self.current.get_blocks():
-            # Something under this tetromino?
-            if self.block_will_collide((block[0], block[1] + 1)):
-                self.sliding = True
-                return
-
-        # Nope
-        self.sliding = False
-
-    # Checks if a block is an explosion frame or not
-    def is_exploding_block(self, type):
-        try:
-            img = int(type)
-            return True
-        except ValueError:
-            return False
+        # Something under this tetromino?
+        self.sliding = self.piece_will_collide(self.current, 0, 1)
+
+    # Which frame of the explosion animation exploding blocks should be on,
+    # based on how far along the clear delay is
+    def get_explosion_frame(self):
+        frame = EXPLOSION_FRAMES - int(self.timers.remaining(CLEAR_TIMER) / (BLOCKS_CLEARED_DELAY / EXPLOSION_FRAMES))
+        return min(max(frame, 1), EXPLOSION_FRAMES)
 
     #
     # Game state routines (updating, input handling)
@@ -629,75 +712,199 @@ class TraditionalMode(GameState):
     # Update the game state based on elapsed time
     def update(self, elapsed_time):
         # Should we really update?
-        if self.paused or self.game_over:
+        if self.paused:
+            return
+
+        # Timers (and particles) keep going after a game over, for any effects still going on
+        self.timers.advance(elapsed_time)
+        self.particles.update(elapsed_time)
+
+        if self.game_over:
             return
 
         # Update the clock, regardless of any clear events
         self.total_time += elapsed_time
+        self.update_held_keys()
 
         # If we're delaying, then we shouldn't update the tetromino
-        if self.handle_delays(elapsed_time):
+        can_move = self.handle_delays(elapsed_time)
+
+        if can_move and self.clear_event == EVENT_NONE:
+            self.play_input_buffer()
+
+        self.update_autoshift(elapsed_time, can_move and self.clear_event == EVENT_NONE)
+
+        if can_move:
             self.time_since_last_move += elapsed_time
             self.update_tetromino(elapsed_time)
 
-    # Takes care of any delays that are in effect (delay before being able to
-    # drop, delay while line(s) are clearing, etc). Returns false whenever an
+    # Returns a copy of the game for drawing (see logicthread.py). It's a shallow
+    # copy of this object, so the resources and such are shared, but anything
+    # the game logic changes in place instead of replacing is copied too. Subclasses
+    # with more things like that need to copy them as well.
+    def take_snapshot(self):
+        snapshot = copy(self)
+        snapshot.board = self.get_snapshot_board()
+        snapshot.current = copy(self.current)
+        snapshot.pieces = self.pieces.copy()
+        snapshot.particles = self.particles.copy()
+        snapshot.full_lines = self.full_lines[:]
+        snapshot.timers = self.timers.copy()
+
+        return snapshot
+
+    # Returns a copy of the board for a snapshot. Snapshots never change their
+    # board, so the last copy gets reused until the board's version changes.
+    # Most ticks just move the tetromino, so the board hardly ever needs to be
+    # copied at all.
+    def get_snapshot_board(self):
+        if self.snapshot_board is None or self.snapshot_board.version != self.board.version:
+            self.snapshot_board = self.board.copy()
+
+        return self.snapshot_board
+
+    # Checks for any delays that are in effect (delay before being able to drop,
+    # delay while line(s) are clearing, etc). Returns false whenever an
     # asynchronous delay is in effect (i.e. no updating should be done); other-
-    # wise, this return true.
+    # wise, this return true. The timers themselves are counted down by the
+    # scheduler in update().
     def handle_delays(self, elapsed_time):
-        # Check if there's a drop delay in effect
-        if self.drop_delay > 0:
-            self.drop_delay -= elapsed_time
-            event.clear()  # Clear any stray events, just in case
+        # Check if there's a drop delay in effect (any keys pressed in the
+        # meantime are buffered, see key_down())
+        if self.timers.pending(DROP_TIMER):
             return False
 
-        # Check if there's a speedup delay in effect
-        if self.speed_delay > 0:
-            self.speed_delay -= elapsed_time
-
-        # Check if we are in the middle of clearing a line
-        if self.blocks_cleared_delay > 0:
-            self.blocks_cleared_delay -= elapsed_time
-
-            if self.blocks_cleared_delay <= 0:
-                self.clear_lines()
-                self.clear_event = EVENT_NONE  # Reset the event
-            else:
-                # Check if we should update any explosions going on
-                for x in range(self.width):
-                    for y in range(self.height):
-                        if self.is_exploding_block(self.tile_grid[int(x)][int(y)]):
-                            if self.blocks_cleared_delay <= 0:
-                                self.tile_grid[int(x)][int(y)] = ' '
-                            else:
-                                frame = EXPLOSION_FRAMES - int(self.blocks_cleared_delay / (BLOCKS_CLEARED_DELAY / EXPLOSION_FRAMES))
-                                self.tile_grid[int(x)][int(y)] = str(frame)
-
-                return False
+        # Check if we are in the middle of clearing a line (explosions animate
+        # themselves, see draw_field_blocks)
+        if self.timers.pending(CLEAR_TIMER):
+            return False
 
         return True  # Nothing stopping us now
 
-    # Moves the tetromino if the right amount of time has passed
+    # Starts the delay while line(s) flash or blocks explode, after which
+    # they're cleared for real
+    def start_clear_delay(self):
+        self.timers.schedule(CLEAR_TIMER, BLOCKS_CLEARED_DELAY, self.finish_clear)
+
+    # Called by the scheduler once the clear delay is over
+    def finish_clear(self):
+        self.clear_lines()
+        self.clear_event = EVENT_NONE  # Reset the event
+
+    # Moves the tetromino if the right amount of time has passed. Gravity is one
+    # cell per delay_threshold milliseconds, so if a frame takes longer than
+    # that, the tetromino falls several cells at once (and the leftover time
+    # carries over to the next frame). A delay of 0 means 20G gravity, i.e. the
+    # tetromino lands immediately. Either way, it doesn't depend on the frame rate.
     def update_tetromino(self, elapsed_time):
-        # Use a different delay threshold depending on the situation
-        speedup = key.get_pressed()[self.main.prefs_controller.get(SPEEDUP_KEY)] and self.speed_delay <= 0
+        if not self.rules.falls:
+            # Is it time to lock in?
+            if self.time_since_last_move > self.slide_delay:
+                self.lock_tetromino()
 
-        if speedup:
-            delay_threshold = self.sped_up_delay
-        elif self.sliding:
-            delay_threshold = self.slide_delay
-        else:
-            delay_threshold = self.tile_delay
+            return
+
+        delay_threshold, speedup = self.get_delay_threshold()
 
         # Is it time to move down?
         if self.time_since_last_move > delay_threshold:
+            if self.sliding and not speedup:
+                # Done sliding, so lock it in (or let it keep falling if it slid off a ledge)
+                cells = 1
+                self.time_since_last_move = 0
+            elif delay_threshold > 0:
+                cells = int(self.time_since_last_move // delay_threshold)
+                self.time_since_last_move -= cells * delay_threshold
+            else:
+                cells = self.height  # 20G
+                self.time_since_last_move = 0
+
             self.sliding = False  # Not sliding anymore, since we're moving down
+            steps = self.fall(cells)
 
+            if speedup:
+                self.score += SCORE_SPED_UP * steps
+
+    # Returns the gravity delay that's in effect right now (it's different
+    # depending on the situation), and whether it's sped up
+    def get_delay_threshold(self):
+        speedup = SPEEDUP_KEY in self.held and not self.timers.pending(SPEED_TIMER)
+
+        if speedup:
+            return (self.sped_up_delay, True)
+        elif self.sliding:
+            return (self.slide_delay, False)
+        else:
+            return (self.tile_delay, False)
+
+    # Returns how far (in rows) below where it really is the tetromino should be
+    # drawn, so that it falls smoothly instead of jumping down a row at a time.
+    # It's just how far along the gravity delay is, including the part of a tick
+    # that's gone by since the last update (see Main.interpolation). Anything
+    # that's holding it up (landing, delays, 20G) means it stays put.
+    def get_fall_offset(self):
+        if self.paused or self.game_over or self.sliding or self.is_input_delayed():
+            return 0
+
+        delay_threshold = self.get_delay_threshold()[0]
+
+        if delay_threshold <= 0 or self.get_ghost_offset() == 0:
+            return 0
+
+        return min((self.time_since_last_move + self.main.interpolation * LOGIC_TICK) / delay_threshold, 1)
+
+    # Moves the current tetromino down by up to the given number of cells, as if
+    # move_down() were called that many times, stopping once it lands (or locks).
+    # Returns the number of move_down() calls that would have taken. Instead of
+    # actually stepping down, this works out where it lands in one go (unless
+    # the rules say otherwise).
+    def fall(self, cells):
+        if self.rules.steps:
+            return self.fall_by_steps(cells)
+
+        distance = min(cells, self.find_landing_offset(self.current, 1))
+        steps = distance
+
+        if distance > 0:
+            self.current.y += distance
+            self.check_for_sliding()  # If a piece lands, we want it to delay more than usual
+
+        # Still have some falling to do, and nothing's holding it up? Then it locks.
+        if distance < cells and not self.sliding:
             self.move_down()
-            self.time_since_last_move = 0
+            steps += 1
 
-            if speedup:
-                self.score += SCORE_SPED_UP
+        return steps
+
+    # Same as fall(), but actually calls move_down() for every cell, for when
+    # something has to happen on every step.
+    def fall_by_steps(self, cells):
+        steps = 0
+
+        while steps < cells:
+            steps += 1
+
+            if not self.move_down() or self.sliding:
+                break
+
+        return steps
+
+    # Moves the tetromino down until it settles into place (adding points for speedy drop)
+    def hard_drop(self):
+        if self.rules.steps:
+            self.hard_drop_by_steps()
+            return
+
+        distance = self.find_landing_offset(self.current, 1)
+
+        self.current.y += distance
+        self.score += SCORE_DROP * distance
+        self.move_down()  # Lock it in
+
+    # Same as hard_drop(), but by calling move_down() for every cell
+    def hard_drop_by_steps(self):
+        while self.move_down():
+            self.score += SCORE_DROP
 
     # Handles key input
     def key_down(self, keycode, unicode):
@@ -716,58 +923,155 @@ class TraditionalMode(GameState):
             self.main.sound_controller.get_sound(SND_PATH + "menu/choose.ogg").play()
             self.main.state = STATE_MAIN_MENU
 
-        # The rest...
-        if not self.paused and self.clear_event == EVENT_NONE:
+        # The rest... (saved for later if the tetromino can't move right now)
+        if not self.paused:
+            if not self.is_input_delayed():
+                self.handle_game_input(keycode)
+            elif keycode in self.keymap:
+                self.input_buffer.append((self.total_time, keycode))
+
+        # Start autoshifting (even if we're in the middle of a line clear, so
+        # it's all charged up afterwards)
+        if not self.paused and keycode in self.autoshift_keycodes:
+            if keycode in self.shift_keys:
+                self.shift_keys.remove(keycode)
+
+            self.shift_keys.append(keycode)
+            self.shift_time = 0
+            self.shifts_done = 0
+
+    # Checks if gameplay keys have to wait, since the tetromino isn't allowed to
+    # move yet (it just appeared, or lines are being cleared)
+    def is_input_delayed(self):
+        return self.clear_event != EVENT_NONE or self.timers.pending(DROP_TIMER) or self.timers.pending(CLEAR_TIMER)
+
+    # Plays back the keys that were pressed during the last delay, in the order
+    # they were pressed. A hard drop that comes less than DROP_DELAY after the
+    # last one is assumed to be a double tap (or the key bouncing) and skipped.
+    # If one of the keys locks the tetromino, the rest were meant for it, so
+    # they're thrown out.
+    def play_input_buffer(self):
+        buffered = self.input_buffer
+        self.input_buffer = []
+
+        for time_pressed, keycode in buffered:
+            if keycode == self.drop_keycode and time_pressed - self.last_drop_time < DROP_DELAY:
+                continue
+
             self.handle_game_input(keycode)
 
-    # Specific handler for actual gameplay
+            if self.is_input_delayed() or self.game_over:
+                break
+
+    # Stops autoshifting when the key is let go. If another autoshift key is
+    # still held down, that one takes over (starting over from the delay).
+    def key_up(self, keycode):
+        if keycode in self.shift_keys:
+            if keycode == self.shift_keys[-1]:
+                self.shift_time = 0
+                self.shifts_done = 0
+
+            self.shift_keys.remove(keycode)
+
+    # Repeats the held down autoshift key as many times as it should have by
+    # now: once after the DAS delay, then once every ARR milliseconds. This way
+    # the number of moves only depends on how long the key's been held, not on
+    # how long the frames are. If we can't move right now (e.g. during the drop
+    # delay), the moves are skipped instead of saved up for later.
+    def update_autoshift(self, elapsed_time, can_shift):
+        if not self.shift_keys:
+            return
+
+        self.shift_time += elapsed_time
+
+        if self.shift_time < self.das_delay:
+            return
+
+        if self.arr > 0:
+            total = int((self.shift_time - self.das_delay) // self.arr) + 1
+            shifts = total - self.shifts_done
+            self.shifts_done = total
+        else:
+            shifts = max(self.width, self.height)  # All the way, every time
+
+        if can_shift:
+            keycode = self.shift_keys[-1]
+
+            for i in range(shifts):
+                # Stop as soon as it can't go any further (or if that just locked
+                # the tetromino, which is only possible in some modes)
+                if not self.handle_game_input(keycode) or self.clear_event != EVENT_NONE or self.game_over:
+                    break
+
+    # Specific handler for actual gameplay. Returns whether the key moved the
+    # tetromino (see the key handlers).
     def handle_game_input(self, keycode):
-        # Any key will reset the delay threshold when sliding
-        if self.sliding:
-            collided = False
+        self.update_held_keys()
 
-            for block in self.current.get_blocks():
-                if self.block_will_collide((block[0] - 1, block[1])) or self.block_will_collide((block[0] + 1, block[1])):
-                    collided = True
+        # Any key will reset the delay threshold when sliding (if there's gravity,
+        # otherwise it's just a countdown)
+        if self.sliding and self.rules.falls:
+            collided = self.piece_will_collide(self.current, -1, 0) or self.piece_will_collide(self.current, 1, 0)
 
             if not collided:
                 self.time_since_last_move = 0
 
         # Check for movement and stuff
-        if keycode == self.main.prefs_controller.get(MOVE_LEFT_KEY):
-            if self.move_left() and self.sliding:
-                self.time_since_last_move = 0  # Rotating extends the sliding period
+        handler = self.keymap.get(keycode)
+        moved = False
 
-        elif keycode == self.main.prefs_controller.get(MOVE_RIGHT_KEY):
-            if self.move_right() and self.sliding:
-                self.time_since_last_move = 0  # Rotating extends the sliding period
+        if handler:
+            moved = handler()
 
-        elif keycode == self.main.prefs_controller.get(ROTATE_RIGHT_KEY) or keycode == self.main.prefs_controller.get(ROTATE_LEFT_KEY):
-            if keycode == self.main.prefs_controller.get(ROTATE_RIGHT_KEY):
-                self.rotate(DEFAULT_ROTATION)
-            else:
-                self.rotate(-DEFAULT_ROTATION)
+        # If we got set to game over, then don't check for sliding
+        if not self.game_over:
+            self.check_for_sliding()
 
-            if self.sliding:
-                self.time_since_last_move = 0  # Rotating extends the sliding period
+        return moved
 
-        elif keycode == self.main.prefs_controller.get(DROP_KEY) and self.drop_delay <= 0:
-            # Moves the tetromino down until it settles into place (adding points for speedy drop).
-            while self.move_down():
-                self.score += SCORE_DROP
+    # Gameplay key handlers (see get_key_handlers()). The ones for autoshift keys
+    # return whether the tetromino moved, so autoshifting knows when to stop.
+    def handle_left_key(self):
+        if self.move_left():
+            self.extend_slide()
+            return True
 
-        elif keycode == self.main.prefs_controller.get(DETONATE_KEY):
-            self.detonate()
+        return False
 
-        # If we got set to game over, then don't check for sliding
-        if not self.game_over:
-            self.check_for_sliding()
+    def handle_right_key(self):
+        if self.move_right():
+            self.extend_slide()
+            return True
+
+        return False
+
+    def handle_rotate_right_key(self):
+        self.rotate(DEFAULT_ROTATION)
+        self.extend_slide()
+
+    def handle_rotate_left_key(self):
+        self.rotate(-DEFAULT_ROTATION)
+        self.extend_slide()
+
+    # Moving/rotating extends the sliding period (except without gravity, where
+    # the lock delay is just a countdown)
+    def extend_slide(self):
+        if self.sliding and self.rules.falls:
+            self.time_since_last_move = 0
+
+    def handle_drop_key(self):
+        if not self.timers.pending(DROP_TIMER):
+            self.last_drop_time = self.total_time
+            self.hard_drop()
+
+    def handle_detonate_key(self):
+        self.detonate()
 
     # Toggles paused state and takes care of music/sound pausing
     def toggle_paused(self):
         # Do a screen transition
         self.paused = not self.paused
-        self.main.transition_screen(TRANSITION_CROSSFADE, self.draw(None, False))
+        self.main.transition_screen(TRANSITION_CROSSFADE, lambda: self.draw(None, False))
 
         # Pause/unpause the music as required
         music_ref = None
@@ -785,14 +1089,10 @@ class TraditionalMode(GameState):
         # Play the paused sound
         self.paused_snd.play()
 
-        # Clear any stray events (players will thank me later, XD)
-        event.clear()
-
-        # Toggle the key repeat between menu/game modes
-        if self.paused:
-            key.set_repeat()  # Disable for pause menu
-        else:
-            key.set_repeat(GAME_KEY_DELAY, GAME_KEY_REPEAT)
+        # Any autoshifting (and anything that was buffered) has to start over
+        # after a pause
+        self.shift_keys = []
+        self.input_buffer = []
 
     #
     # Drawing routines
@@ -800,6 +1100,7 @@ class TraditionalMode(GameState):
 
     # Renders the scene
     def draw_scene(self, mode, surface):
+        self.update_viewport()
         self.draw_environment(surface)
         self.draw_blocks(surface)
 
@@ -829,21 +1130,59 @@ class TraditionalMode(GameState):
 
         self.draw_preview(surface)
 
-    # Show the preview if we're allowed
+    # Show the preview if we're allowed. The next tetromino goes in the box on
+    # the scorebar, and any more after that go down the side, shrunk down.
     def draw_preview(self, surface):
         if self.main.prefs_controller.get(SHOW_PREVIEW):
-            surface.blit(self.tile_previews[self.get_next_type(False)], (337, 135))
+            upcoming = self.pieces.peek(self.preview_count)
+            surface.blit(self.tile_previews[upcoming[0]], (337, 135))
+
+            for i in range(1, len(upcoming)):
+                surface.blit(self.small_tile_previews[upcoming[i]], (SMALL_PREVIEW_X, SMALL_PREVIEW_Y + (i - 1) * SMALL_PREVIEW_SPACING))
+
+    # Scrolls the board so the current tetromino is on the screen, along with as
+    # much of the way to where it's going to land as will fit. On a board that's
+    # no bigger than the screen, this never moves.
+    def update_viewport(self):
+        left, right, top, bottom = self.current.get_extremities()
+        y_offset = self.get_ghost_offset()
+
+        if abs(y_offset) + bottom - top < VIEW_ROWS:
+            self.scroll_to(left, right, min(top, top + y_offset), max(bottom, bottom + y_offset))
+        elif y_offset > 0:
+            self.scroll_to(left, right, top, top + VIEW_ROWS - 1)
+        else:
+            self.scroll_to(left, right, bottom - VIEW_ROWS + 1, bottom)
+
+    # Centers the view on the given blocks, without going past the board's edges
+    # (or into the hidden rows)
+    def scroll_to(self, left, right, top, bottom):
+        x = (left + right + 1) // 2 - VIEW_COLS // 2
+        y = (top + bottom + 1) // 2 - VIEW_ROWS // 2
+
+        self.view_x = min(max(x, 0), self.width - VIEW_COLS)
+        self.view_y = min(max(y, self.grid_y_offset), self.height - VIEW_ROWS)
+
+    # Converts a grid location into where it goes on the screen
+    def grid_to_pixels(self, x, y):
+        return (PIXEL_X_OFFSET + (x - self.view_x) * BLOCK_SIZE[0], int((y - self.view_y) * BLOCK_SIZE[1]))  # Might be between rows
 
-    # Draws all blocks on the screen
+    # Draws all blocks on the screen (and any particles behind them). Anything
+    # that's scrolled off the playing field gets clipped.
     def draw_blocks(self, surface):
+        surface.set_clip(FIELD_RECT)
+        self.particles.draw(surface, self.grid_to_pixels(0, 0))
         self.draw_current_tetromino(surface)
         self.draw_field_blocks(surface)
+        surface.set_clip(None)
 
     # Draw the currently moving tetromino if the lines aren't flashing
     def draw_current_tetromino(self, surface):
         if self.clear_event != EVENT_LINE_CLEAR and self.clear_event != EVENT_BOMB:
+            fall_offset = self.get_fall_offset()
+
             for block in self.current.get_blocks():
-                self.draw_block(surface, self.current.type, block)
+                self.draw_block(surface, self.current.type, (block[0], block[1] + fall_offset))
 
             # Draw the ghost piece if necessary
             if self.main.prefs_controller.get(DRAW_GHOST):
@@ -856,28 +1195,44 @@ class TraditionalMode(GameState):
 
     # Draw the ghost version of the tetromino
     def draw_ghost_piece(self, surface):
-        y_offset = 0
-        save_y = self.current.center_y
+        y_offset = self.get_ghost_offset()
 
-        # Move the tetromino down until it collides
-        collided = False
-
-        while not collided:
+        # Draw the blocks
+        if y_offset != 0:
             for block in self.current.get_blocks():
-                if self.block_will_collide(block):
-                    collided = True
+                self.draw_block(surface, self.current.type, (block[0], block[1] + y_offset), True)
 
-            if not collided:
-                self.current.center_y += 1
+    # Returns how many rows the current tetromino can fall before it collides.
+    # This only gets recalculated when the tetromino moves or rotates, or the
+    # board changes, so most frames just get the cached value.
+    def get_ghost_offset(self):
+        current = self.current
+        key = (self.board.version, current.shape, current.rot, current.x, current.y)
 
-        # Calculate the offset and restore the old y
-        y_offset = self.current.center_y - save_y - 1
-        self.current.center_y = save_y
+        if key != self.ghost_key:
+            self.ghost_key = key
+            self.ghost_offset = self.find_landing_offset(current, self.rules.get_gravity(current.center_y))
 
-        # Draw the blocks
-        if y_offset > 0:
-            for block in self.current.get_blocks():
-                self.draw_block(surface, self.current.type, (block[0], block[1] + y_offset), True)
+        return self.ghost_offset
+
+    # Returns how far the tetromino can move in the given direction before it
+    # collides. The board's column surfaces usually know right away (in either
+    # direction); otherwise, this moves the tetromino's masks (not the tetromino
+    # itself) until they collide, and returns the last offset that didn't.
+    def find_landing_offset(self, tetromino, dy):
+        profile = tetromino.get_bottoms() if dy > 0 else tetromino.get_tops()
+        distance = self.board.landing_distance(profile, tetromino.x, tetromino.y, dy)
+
+        if distance is not None:
+            return distance * dy
+
+        row_masks, bounds = tetromino.get_row_masks(), tetromino.get_bounds()
+        y_offset = 0
+
+        while not self.board.collides_masks(row_masks, bounds, tetromino.x, tetromino.y + y_offset + dy):
+            y_offset += dy
+
+        return y_offset
 
     # Determines if we should draw an "about to lock!" visual warning
     def should_draw_warning(self):
@@ -885,33 +1240,43 @@ class TraditionalMode(GameState):
 
         if not draw_warning:
             # One more check...
-            for block in self.current.get_blocks():
-                if self.block_will_collide((block[0], block[1] + 1), DETECT_VERT):
-                    draw_warning = True
+            draw_warning = self.piece_will_collide(self.current, 0, 1)
 
         return draw_warning
 
     # Draws the rest of the blocks on the playing field
     def draw_field_blocks(self, surface):
-        # Draw the other blocks
-        for y in range(self.grid_y_offset, self.height):
-            for x in range(self.width):
-                if self.tile_grid[int(x)][int(y)] != ' ':
-                    self.draw_block(surface, self.tile_grid[int(x)][int(y)], (x, y))
+        # Exploding blocks all show the same frame of the animation
+        types = CELL_TYPES[:]
+        types[CELL_EXPLOSION] = str(self.get_explosion_frame())
+
+        # Draw the other blocks (only the rows that are on the screen)
+        for y in range(self.view_y, self.view_y + VIEW_ROWS):
+            if not self.board.is_empty_row(y):  # Skip empty rows entirely
+                self.draw_row(surface, types, y)
 
             # Flash the lines we're clearing
             if self.full_lines[y]:
-                self.draw_flashing_line(surface, y, self.sin_lookup[self.blocks_cleared_delay])
+                self.draw_flashing_line(surface, y, self.sin_lookup[int(self.timers.remaining(CLEAR_TIMER))])
+
+    # Draws the blocks in one row of the playing field (the part that's on the
+    # screen), given the tile type to draw for each cell code
+    def draw_row(self, surface, types, y):
+        row = self.board.rows[y]
+
+        for x in range(self.view_x, self.view_x + VIEW_COLS):
+            if row[x] != CELL_EMPTY:
+                self.draw_block(surface, types[row[x]], (x, y))
 
     # Draws a white, translucent rect over a line to make it flash
     def draw_flashing_line(self, surface, y, transparency):
         # Create a white surface to cover the line
-        white = Surface((BLOCK_SIZE[0] * self.width, BLOCK_SIZE[1]))
+        white = Surface((BLOCK_SIZE[0] * VIEW_COLS, BLOCK_SIZE[1]))
         white.fill((255, 255, 255))
 
         # Set its transparency based on where we are in the blink and then blit it.
         white.set_alpha(transparency)
-        surface.blit(white, (PIXEL_X_OFFSET, (y - self.grid_y_offset) * BLOCK_SIZE[0]))
+        surface.blit(white, self.grid_to_pixels(self.view_x, y))
 
     # Draws a single block at a given grid location
     def draw_block(self, surface, type, grid_loc, ghost=False):
@@ -920,12 +1285,8 @@ class TraditionalMode(GameState):
         else:
             block_img = self.tiles[type]
 
-        # Calculate pixel coordinates (with a pixel offset on the x-axis)
-        x = PIXEL_X_OFFSET + grid_loc[0] * block_img.get_width()
-        y = (grid_loc[1] - self.grid_y_offset) * block_img.get_height()
-
-        # Draw it
-        surface.blit(block_img, (x, y))
+        # Draw it wherever it is on the screen
+        surface.blit(block_img, self.grid_to_pixels(grid_loc[0], grid_loc[1]))
 
     # Draws a little fade overlay when the piece is sliding
     def draw_block_overlay(self, surface, location):
@@ -935,7 +1296,7 @@ class TraditionalMode(GameState):
 
         # Set its transparency based on how close we are to getting a next piece and then blit it.
         overlay.set_alpha(LOCK_DELAY_MAX_ALPHA * (float(self.time_since_last_move) / self.slide_delay))
-        surface.blit(overlay, (PIXEL_X_OFFSET + location[0] * BLOCK_SIZE[0], (location[1] - self.grid_y_offset) * BLOCK_SIZE[0]))
+        surface.blit(overlay, self.grid_to_pixels(location[0], location[1]))
 
     # Does what it says. ;)
     def draw_gameover_overlay(self, surface):
@@ -0,0 +1,80 @@
+#
+# 1337ris -- test_convergencemode.py
+# Henry Weiss
+#
+# Checks that Convergence's left/right pieces get placed right up against
+# whatever's stacked up at the sides, without ending up inside it.
+#
+
+from random import Random
+
+from src.headers import *
+
+# Makes a Convergence mode with just a board to play with (no resources, etc.)
+def make_mode(size=GRID_SIZE):
+    mode = ConvergenceMode.__new__(ConvergenceMode)
+    mode.size = size
+    mode.width, mode.height = size
+    mode.board = Board(size)
+    return mode
+
+# Fills in the given columns of a row
+def fill(mode, y, columns):
+    for x in columns:
+        mode.board.set(x, y, 'I')
+
+# Spawns a tetromino just outside the given wall (dx is 1 for the left one,
+# -1 for the right), the way reset() does, and moves it in
+def place(mode, type, rot, dx):
+    tetromino = Tetromino()
+    tetromino.reset(type, (-1 if dx > 0 else mode.width, SPAWN_ROW))
+    tetromino.rot = rot
+    mode.move_to_edge(tetromino, dx)
+    return tetromino
+
+# Where the tetromino would end up sliding in from the wall one column at a time
+def slide_in(mode, tetromino, dx):
+    left, right = tetromino.get_bounds()[:2]
+    x = -left if dx > 0 else mode.width - 1 - right
+    limit = mode.width - 1 - right if dx > 0 else -left
+
+    while x != limit and mode.piece_will_collide(tetromino, x - tetromino.x):
+        x += dx
+
+    return x
+
+def test_skips_past_gaps_in_a_row():
+    mode = make_mode()
+
+    # Columns 1 and 2 are filled, so the first gap (column 0) is too small for
+    # a flat I, which has to go past them instead
+    for y in range(2, 6):
+        fill(mode, y, [1, 2])
+
+    left = place(mode, 'I', 0, 1)
+    assert not mode.piece_will_collide(left)
+    assert left.get_extremities()[0] == 3
+
+    # Same thing from the right
+    mode = make_mode()
+
+    for y in range(2, 6):
+        fill(mode, y, [mode.width - 2, mode.width - 3])
+
+    right = place(mode, 'I', 0, -1)
+    assert not mode.piece_will_collide(right)
+    assert right.get_extremities()[1] == mode.width - 4
+
+def test_matches_sliding_in():
+    random = Random(1337)
+
+    for i in range(500):
+        mode = make_mode((random.randint(GRID_WIDTH, 20), GRID_HEIGHT))
+
+        for y in range(mode.height):
+            fill(mode, y, [x for x in range(mode.width) if random.random() < 0.3])
+
+        for type in NORMAL_TILES:
+            for dx in (1, -1):
+                tetromino = place(mode, type, random.randrange(4), dx)
+                assert tetromino.x == slide_in(mode, tetromino, dx)
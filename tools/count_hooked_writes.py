@@ -0,0 +1,86 @@
+#
+# 1337ris -- count_hooked_writes.py
+# Henry Weiss
+#
+# Benchmark for how many attribute writes go through Python-level code (a
+# __setattr__ override or a property setter) per frame. Plays each game mode
+# for a while with random input and counts them up.
+#
+# Usage: python tools/count_hooked_writes.py [checkout]
+#
+# The checkout defaults to this one. Point it at another one (e.g. a git
+# worktree of an older commit) to compare before and after.
+#
+
+import os, sys
+
+# Frames to play per mode, how long each one is (ms), and how often a key gets pressed
+FRAMES = 3000
+FRAME_TIME = 16
+KEY_CHANCE = 0.1
+SEED = 1
+
+# Run without a window or sound
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+root = os.path.abspath(sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(__file__), os.pardir))
+sys.path.insert(0, root)
+os.chdir(root)  # Resources are loaded relative to the checkout
+
+from src.headers import *
+
+# Hooked writes so far, by class (and property name)
+counts = {}
+
+# Counts every write that goes through the class's own __setattr__ or property setters
+def count_writes(cls):
+    attrs = cls.__dict__
+
+    if '__setattr__' in attrs:
+        def hook(self, name, value, setattr=attrs['__setattr__']):
+            counts[cls.__name__] = counts.get(cls.__name__, 0) + 1
+            setattr(self, name, value)
+
+        cls.__setattr__ = hook
+
+    for name, value in list(attrs.items()):
+        if isinstance(value, property) and value.fset:
+            def fset(self, new_value, fset=value.fset, key=cls.__name__ + '.' + name):
+                counts[key] = counts.get(key, 0) + 1
+                fset(self, new_value)
+
+            setattr(cls, name, property(value.fget, fset))
+
+for cls in (Main, MainMenu, SoundController, Tetromino, TraditionalMode, CrossCutMode, ConvergenceMode, PsychedelicMode):
+    count_writes(cls)
+
+# No waiting around for the music to fade out
+Main.fadeout_sound = lambda self, delay=1000: None
+
+app = Main()
+app.fullscreen = False
+app.load_resources()
+app.load_wait = 0
+
+for name, state in (("Traditional", STATE_TRADITIONAL), ("Cross-Cut", STATE_CROSS_CUT),
+                    ("Convergence", STATE_CONVERGENCE), ("Psychedelic", STATE_PSYCHEDELIC)):
+    rng = Random(SEED)
+    seed(SEED)
+
+    app.state = state
+    app.in_transition = False
+    mode = app.states[state]
+    keys = [app.prefs_controller.get(k) for k in (MOVE_LEFT_KEY, MOVE_RIGHT_KEY, ROTATE_RIGHT_KEY, DROP_KEY)]
+    counts.clear()
+
+    for frame in range(FRAMES):
+        if mode.game_over:
+            mode.start()
+
+        if rng.random() < KEY_CHANCE:
+            mode.key_down(rng.choice(keys), '')
+
+        mode.update(FRAME_TIME)
+
+    print("%-12s %6.2f hooked writes/frame  %s" % (name, sum(counts.values()) / FRAMES, counts))